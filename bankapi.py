@@ -0,0 +1,479 @@
+"""Asyncio HTTP/JSON service over BankDB, standard library only.
+
+    python bankapi.py serve [--sqlite PATH] [--host H] [--port P] [--workers N] [--token T]
+    python bankapi.py loadtest [--port P] [--path /health] [--requests N] [--connections C] [--pipeline D]
+
+Endpoints (JSON in, JSON out):
+
+    GET  /health
+    GET  /accounts?search=&status=&type=&cursor=&limit=
+    GET  /accounts/{id}
+    POST /accounts/{id}/deposit            {"amount": 100, "note": "..."}
+    POST /accounts/{id}/withdraw           {"amount": 100, "note": "..."}
+    GET  /accounts/{id}/transactions?from=&to=&cursor=&limit=
+    GET  /accounts/{id}/loans?status=&cursor=&limit=
+    GET  /accounts/{id}/debts?status=&cursor=&limit=
+    POST /transfers                        {"from_account_id": 1, "to_account_id": 2, "amount": 5, "note": "..."}
+    POST /loans                            {"account_id": 1, "amount": 5000, "term_months": 12, "rate": 4.5}
+    POST /debts/{id}/settle
+
+The event loop only parses and writes HTTP. BankDB calls run on a pool of
+``workers`` threads, each leasing its own pooled connection. Requests
+pipelined on one connection behave as if run one after another: reads
+between two writes overlap, but a write waits for everything before it
+and a read waits for the writes before it. Responses go back in request
+order.
+
+Backpressure works at two levels. A connection stops being read once
+API_PIPELINE_DEPTH of its requests are in flight. Once API_MAX_PENDING
+requests are waiting for a worker across all connections, new ones get
+an immediate 503 with Retry-After.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import parse_qs, urlsplit
+
+from bankcore import BankDB, IntegrityError
+
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_WORKERS = 8             # worker threads = pooled database connections
+API_MAX_PENDING = 256       # requests queued for a worker before new ones get 503
+API_PIPELINE_DEPTH = 16     # requests in flight per connection before it stops being read
+API_MAX_BODY = 64 * 1024    # bytes
+API_IDLE_TIMEOUT = 30       # seconds a keep-alive connection may sit idle
+API_PAGE_LIMIT = 500        # largest page a client may ask for
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 411: "Length Required", 413: "Payload Too Large",
+               500: "Internal Server Error", 501: "Not Implemented", 503: "Service Unavailable"}
+
+ACCOUNT_FIELDS = ("id", "account_number", "name", "emirates_id", "balance", "phone", "email",
+                  "account_type", "status", "created_at")
+ACCOUNT_PAGE_FIELDS = ("id", "account_number", "name", "emirates_id", "balance", "account_type", "status",
+                       "created_at")
+LOAN_FIELDS = ("id", "account_id", "amount", "term_months", "rate", "status", "created_at")
+DEBT_FIELDS = ("id", "account_id", "amount", "description", "status", "created_at")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _rows(fields, rows):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _page(fields, page):
+    rows, next_cursor = page
+    return {"items": _rows(fields, rows), "next_cursor": next_cursor}
+
+
+def _limit(query):
+    try:
+        return max(1, min(int(query.get("limit", 100)), API_PAGE_LIMIT))
+    except ValueError:
+        raise HTTPError(400, "limit must be an integer")
+
+
+def _amount(body):
+    try:
+        amount = float(body["amount"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPError(400, "amount is required and must be a number")
+    if not math.isfinite(amount):
+        raise HTTPError(400, "amount must be a finite number")
+    if amount <= 0:
+        raise HTTPError(400, "amount must be positive")
+    return amount
+
+
+def _date(query, key):
+    if not query.get(key):
+        return None
+    try:
+        return datetime.fromisoformat(query[key])
+    except ValueError:
+        raise HTTPError(400, f"{key} must be an ISO date")
+
+
+# Handlers run on a worker thread: (db, path ids, query dict, JSON body) -> (status, payload)
+
+def api_health(db, ids, query, body):
+    return 200, {"ok": True, "pool": db.pool_stats(), "transfers": db.txn_stats()}
+
+
+def api_accounts(db, ids, query, body):
+    filters = {"search": query.get("search"), "status": query.get("status"), "account_type": query.get("type")}
+    return 200, _page(ACCOUNT_PAGE_FIELDS,
+                      db.get_accounts_page(filters, cursor=query.get("cursor"), limit=_limit(query)))
+
+
+def api_account(db, ids, query, body):
+    row = db.get_account(ids[0])
+    if row is None:
+        raise HTTPError(404, "Account not found")
+    return 200, dict(zip(ACCOUNT_FIELDS, row))
+
+
+def _balance_change(trans_type, sign):
+    def handler(db, ids, query, body):
+        balance = db.change_balance(ids[0], sign * _amount(body), trans_type=trans_type, note=body.get("note"))
+        return 200, {"account_id": ids[0], "balance": balance}
+    return handler
+
+
+def api_transactions(db, ids, query, body):
+    return 200, _page(db.TRANSACTION_COLUMNS,
+                      db.get_transactions_page(ids[0], _date(query, "from"), _date(query, "to"),
+                                               cursor=query.get("cursor"), limit=_limit(query)))
+
+
+def api_loans(db, ids, query, body):
+    return 200, _page(LOAN_FIELDS, db.get_loans_page(ids[0], query.get("status"), cursor=query.get("cursor"),
+                                                     limit=_limit(query)))
+
+
+def api_debts(db, ids, query, body):
+    return 200, _page(DEBT_FIELDS, db.get_debts_page(ids[0], query.get("status"), cursor=query.get("cursor"),
+                                                     limit=_limit(query)))
+
+
+def api_transfer(db, ids, query, body):
+    try:
+        src, dst = int(body["from_account_id"]), int(body["to_account_id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPError(400, "from_account_id and to_account_id are required")
+    from_balance, to_balance = db.transfer_funds(src, dst, _amount(body), note=body.get("note"))
+    return 200, {"from_account_id": src, "from_balance": from_balance,
+                 "to_account_id": dst, "to_balance": to_balance}
+
+
+def api_create_loan(db, ids, query, body):
+    try:
+        account_id, term, rate = int(body["account_id"]), int(body["term_months"]), float(body["rate"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPError(400, "account_id, term_months and rate are required")
+    if not math.isfinite(rate):
+        raise HTTPError(400, "rate must be a finite number")
+    if db.get_account(account_id) is None:
+        raise HTTPError(404, "Account not found")
+    return 201, {"loan_id": db.create_loan(account_id, _amount(body), term, rate)}
+
+
+def api_settle_debt(db, ids, query, body):
+    return 200, {"debt_id": ids[0], "balance": db.settle_debt(ids[0])}
+
+
+ROUTES = [
+    ("GET", r"/health", api_health),
+    ("GET", r"/accounts", api_accounts),
+    ("GET", r"/accounts/(\d+)", api_account),
+    ("POST", r"/accounts/(\d+)/deposit", _balance_change("deposit", 1)),
+    ("POST", r"/accounts/(\d+)/withdraw", _balance_change("withdraw", -1)),
+    ("GET", r"/accounts/(\d+)/transactions", api_transactions),
+    ("GET", r"/accounts/(\d+)/loans", api_loans),
+    ("GET", r"/accounts/(\d+)/debts", api_debts),
+    ("POST", r"/transfers", api_transfer),
+    ("POST", r"/loans", api_create_loan),
+    ("POST", r"/debts/(\d+)/settle", api_settle_debt),
+]
+_ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ROUTES]
+
+
+class BankAPI:
+    """The HTTP front end; one instance serves every connection of the event loop."""
+
+    def __init__(self, db, workers=API_WORKERS, max_pending=API_MAX_PENDING, token=None):
+        self.db = db
+        self.token = token
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bankapi-worker")
+        self.pending = 0
+        self.stats = {"requests": 0, "rejected_busy": 0, "errors": 0, "connections": 0}
+
+    async def handle_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        responses = asyncio.Queue(maxsize=API_PIPELINE_DEPTH)
+        sender = asyncio.ensure_future(self._send_responses(responses, writer))
+        last_write, reads = None, []  # the newest write, and reads started after it
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), API_IDLE_TIMEOUT)
+                except HTTPError as e:
+                    await self._enqueue(responses, (self._done(e.status, {"error": str(e)}), False), sender)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                if method in ("GET", "HEAD"):
+                    task = asyncio.ensure_future(self._after([last_write], method, target, headers, body))
+                    reads = [t for t in reads if not t.done()] + [task]
+                else:
+                    task = asyncio.ensure_future(self._after([last_write] + reads, method, target, headers, body))
+                    last_write, reads = task, []
+                # blocks while API_PIPELINE_DEPTH responses are outstanding
+                if not await self._enqueue(responses, (task, keep_alive), sender) or not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await self._enqueue(responses, (None, False), sender)
+            try:
+                await sender
+            except ConnectionError:
+                pass
+            except Exception:
+                logging.exception("API connection failed")
+            writer.close()
+
+    async def _after(self, earlier, method, target, headers, body):
+        """Dispatch once the ``earlier`` requests of the same connection have finished."""
+        earlier = [t for t in earlier if t is not None and not t.done()]
+        if earlier:
+            await asyncio.wait(earlier)
+        return await self._dispatch(method, target, headers, body)
+
+    @staticmethod
+    async def _enqueue(responses, item, sender):
+        """Queue a response for the sender; False if the sender has already stopped."""
+        put = asyncio.ensure_future(responses.put(item))
+        await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            return False
+        return True
+
+    @staticmethod
+    def _done(status, payload):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result((status, payload))
+        return future
+
+    async def _send_responses(self, responses, writer):
+        while True:
+            task, keep_alive = await responses.get()
+            if task is None:
+                return
+            status, payload = await task
+            try:
+                body = json.dumps(payload, default=_json_default, allow_nan=False).encode()
+            except ValueError:
+                # a NaN/Infinity already in the database; never emit non-standard JSON
+                logging.exception("API response is not valid JSON")
+                status, body = 500, b'{"error": "Response contains a non-finite number"}'
+            head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                    "Content-Type: application/json", f"Content-Length: {len(body)}",
+                    "Connection: " + ("keep-alive" if keep_alive else "close")]
+            if status == 503:
+                head.append("Retry-After: 1")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+            await writer.drain()
+            if not keep_alive:
+                return
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(501, "Chunked request bodies are not supported")
+        length = headers.get("content-length") or "0"
+        if not length.isdigit():
+            raise HTTPError(400, "Invalid Content-Length")
+        length = int(length)
+        if length > API_MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target, headers, body, keep_alive
+
+    async def _dispatch(self, method, target, headers, body):
+        self.stats["requests"] += 1
+        if self.token and headers.get("authorization") != f"Bearer {self.token}":
+            return 401, {"error": "Missing or invalid bearer token"}
+        url = urlsplit(target)
+        allowed = False
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method == method:
+                break
+        else:
+            return (405, {"error": "Method not allowed"}) if allowed else (404, {"error": "No such endpoint"})
+
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise ValueError
+        except ValueError:
+            return 400, {"error": "Body must be a JSON object"}
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        ids = [int(g) for g in match.groups()]
+
+        if self.pending >= self.max_pending:
+            self.stats["rejected_busy"] += 1
+            return 503, {"error": "Server busy, retry later"}
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, self._call, handler, ids, query, payload)
+        finally:
+            self.pending -= 1
+
+    def _call(self, handler, ids, query, body):
+        try:
+            return handler(self.db, ids, query, body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except IntegrityError as e:
+            return 409, {"error": str(e)}
+        except ValueError as e:
+            return (404 if "not found" in str(e).lower() else 400), {"error": str(e)}
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.exception("API request failed")
+            return 500, {"error": str(e)}
+
+    async def serve(self, host=API_HOST, port=API_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logging.info(f"Bank API listening on {host}:{port}")
+        print(f"Bank API listening on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+async def loadtest(host=API_HOST, port=API_PORT, path="/health", requests=10000, connections=16,
+                   pipeline=8, token=None):
+    """Drive ``GET path`` over ``connections`` keep-alive connections with ``pipeline`` requests in flight each.
+
+    Returns a dict with requests/second, latency percentiles and status counts.
+    """
+    auth = f"Authorization: Bearer {token}\r\n" if token else ""
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{auth}\r\n".encode()
+    latencies, statuses = [], {}
+    per_connection = [requests // connections + (i < requests % connections) for i in range(connections)]
+
+    async def client(count):
+        reader, writer = await asyncio.open_connection(host, port)
+        sent_at = []
+        try:
+            done = 0
+            while done < count:
+                batch = min(pipeline, count - done)
+                for _ in range(batch):
+                    sent_at.append(time.perf_counter())
+                writer.write(request * batch)
+                await writer.drain()
+                for _ in range(batch):
+                    status = int((await reader.readline()).split()[1])
+                    length = 0
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b""):
+                            break
+                        if line.lower().startswith(b"content-length:"):
+                            length = int(line.split(b":")[1])
+                    await reader.readexactly(length)
+                    latencies.append(time.perf_counter() - sent_at[done])
+                    statuses[status] = statuses.get(status, 0) + 1
+                    done += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in per_connection if n))
+    seconds = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else None
+    return {"requests": len(latencies), "seconds": round(seconds, 3),
+            "requests_per_sec": round(len(latencies) / seconds, 1), "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95), "p99_ms": pct(0.99), "statuses": statuses}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bankapi", description="Asyncio JSON API over BankDB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the API server")
+    serve.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    serve.add_argument("--host", default=API_HOST)
+    serve.add_argument("--port", type=int, default=API_PORT)
+    serve.add_argument("--workers", type=int, default=API_WORKERS)
+    serve.add_argument("--max-pending", type=int, default=API_MAX_PENDING)
+    serve.add_argument("--token", default=os.environ.get("BANK_API_TOKEN"),
+                       help="require 'Authorization: Bearer TOKEN' (default $BANK_API_TOKEN)")
+    load = sub.add_parser("loadtest", help="measure throughput of a running server")
+    load.add_argument("--host", default=API_HOST)
+    load.add_argument("--port", type=int, default=API_PORT)
+    load.add_argument("--path", default="/health")
+    load.add_argument("--requests", type=int, default=10000)
+    load.add_argument("--connections", type=int, default=16)
+    load.add_argument("--pipeline", type=int, default=8)
+    load.add_argument("--token", default=os.environ.get("BANK_API_TOKEN"))
+    args = parser.parse_args(argv)
+
+    if args.command == "loadtest":
+        print(json.dumps(asyncio.run(loadtest(args.host, args.port, args.path, args.requests,
+                                              args.connections, args.pipeline, args.token))))
+        return 0
+
+    # one pooled connection per worker thread
+    pool = max(2, args.workers)
+    try:
+        db = BankDB(backend="sqlite", sqlite_path=args.sqlite, pool_size=pool) if args.sqlite else BankDB(pool_size=pool)
+    except Exception as e:
+        print(f"bankapi: {e}", file=sys.stderr)
+        return 3
+    api = BankAPI(db, workers=args.workers, max_pending=args.max_pending, token=args.token)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Headless batch jobs over BankDB, for cron-driven batch windows.
+
+    python bankcli.py [--sqlite PATH] [--pool N] [--json] COMMAND [options]
+
+Commands: report, export-accounts, export-transactions, export-job,
+bulk-transfer, verify-summary, archive, backfill-flows (``COMMAND -h``
+lists the options of each).
+
+Progress is streamed to stderr while a job runs. When it ends one summary
+line goes to stdout, as JSON with --json, with the row count, elapsed
+seconds and rows per second; with --json that line is all stdout carries
+(``report`` then prints to stderr unless -o is given). Exit status: 0 success, 1 the job failed or
+found problems (rejected transfer lines, summary drift), 2 bad usage,
+3 the database could not be reached.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+
+from bankcore import (BankDB, ARCHIVE_AFTER_DAYS, BULK_CHUNK_SIZE, DB_POOL_SIZE, EXPORT_WORKERS,
+                      format_report)
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_NO_DB = 0, 1, 2, 3
+PROGRESS_INTERVAL = 1.0   # seconds between progress lines on stderr
+
+
+class _Progress:
+    """Throttled progress lines on stderr (overwritten in place on a terminal)."""
+
+    def __init__(self, label):
+        self.label = label
+        self.last = 0.0
+        self.counts = self.shown = None
+        self.tty = sys.stderr.isatty()
+
+    def __call__(self, *counts):
+        self.counts = counts
+        now = time.monotonic()
+        if now - self.last < PROGRESS_INTERVAL:
+            return
+        self.last = now
+        self._print(counts)
+
+    def _print(self, counts):
+        self.shown = counts
+        text = "/".join(f"{c:,}" for c in counts)
+        print(f"{self.label}: {text}", file=sys.stderr, end="\r" if self.tty else "\n", flush=True)
+
+    def done(self):
+        """Print the final count if throttling held it back, and end the line."""
+        if self.counts is not None and self.counts != self.shown:
+            self._print(self.counts)
+        if self.tty and self.shown is not None:
+            print(file=sys.stderr)
+
+
+def _date(value):
+    return datetime.fromisoformat(value)
+
+
+def cmd_report(db, args):
+    report = format_report(db.get_statistics(fresh=True))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        # with --json, stdout is reserved for the summary line
+        (sys.stderr if args.json else sys.stdout).write(report)
+    return EXIT_OK, {"output": args.output}
+
+
+def cmd_export_accounts(db, args):
+    filters = {k: v for k, v in (("search", args.search), ("search_col", args.search_col),
+                                 ("status", args.status), ("account_type", args.type)) if v}
+    progress = _Progress("accounts exported")
+    rows = db.export_accounts_csv(args.file, filters=filters or None, progress=progress)
+    progress.done()
+    return EXIT_OK, {"rows": rows, "output": args.file}
+
+
+def cmd_export_transactions(db, args):
+    progress = _Progress("transactions exported")
+    rows = db.export_transactions_csv(args.file, acc_id=args.account, date_from=args.date_from,
+                                      date_to=args.date_to, progress=progress)
+    progress.done()
+    return EXIT_OK, {"rows": rows, "output": args.file}
+
+
+def cmd_export_job(db, args):
+    progress = _Progress("partitions done")
+    manifest = db.export_transactions_job(args.directory, partition_by=args.partition_by, fmt=args.format,
+                                          partitions=args.partitions, workers=args.workers,
+                                          date_from=args.date_from, date_to=args.date_to,
+                                          processes=not args.threads, progress=progress)
+    progress.done()
+    return EXIT_OK, {"rows": manifest["total_rows"], "files": len(manifest["files"]), "output": args.directory}
+
+
+def _read_transfers(path):
+    """Parse ``to_account_id,amount[,note]`` lines; returns (transfers, line numbers, bad lines)."""
+    transfers, line_numbers, bad = [], [], []
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        for ln, parts in enumerate(csv.reader(f), start=1):
+            parts = [p.strip() for p in parts]
+            if not any(parts):
+                continue
+            try:
+                if len(parts) < 2:
+                    raise ValueError("expected to_account_id,amount[,note]")
+                transfers.append((int(parts[0]), float(parts[1]), ",".join(parts[2:]) or None))
+                line_numbers.append(ln)
+            except ValueError as e:
+                bad.append((ln, str(e)))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return transfers, line_numbers, bad
+
+
+def cmd_bulk_transfer(db, args):
+    transfers, line_numbers, bad = _read_transfers(args.file)
+    for ln, error in bad:
+        print(f"line {ln}: {error}", file=sys.stderr)
+    atomic = not args.best_effort
+    if bad and atomic:
+        return EXIT_FAILED, {"rows": 0, "rejected": len(bad), "committed": False}
+
+    batch = args.batch_size or len(transfers) or 1
+    applied = failed = 0
+    committed = True
+    progress = _Progress("transfers processed")
+    for start in range(0, len(transfers), batch):
+        result = db.transfer_many(args.source, transfers[start:start + batch], atomic=atomic, dry_run=args.dry_run)
+        for index, to_id, amount, error in result["failed"]:
+            print(f"line {line_numbers[start + index]}: {to_id} {amount:.2f}: {error}", file=sys.stderr)
+        applied += len(result["applied"])
+        failed += len(result["failed"])
+        # a best-effort batch whose lines all failed has nothing to commit
+        committed = committed and (result["committed"] or args.dry_run or not (atomic or result["applied"]))
+        progress(min(start + batch, len(transfers)), len(transfers))
+        if atomic and result["failed"]:
+            break
+    progress.done()
+    ok = not failed and not bad and committed
+    return EXIT_OK if ok else EXIT_FAILED, {"rows": applied, "rejected": failed + len(bad),
+                                            "committed": committed and not args.dry_run,
+                                            "dry_run": args.dry_run}
+
+
+def cmd_verify_summary(db, args):
+    drift = db.verify_summary(repair=args.repair)
+    for d in drift:
+        print("DRIFT", " ".join(f"{k}={v}" for k, v in d.items()), file=sys.stderr)
+    return EXIT_FAILED if drift else EXIT_OK, {"drift": len(drift), "repaired": bool(drift and args.repair)}
+
+
+def cmd_archive(db, args):
+    progress = _Progress("transactions archived")
+    moved = db.archive_transactions(args.days, progress=progress)
+    progress.done()
+    return EXIT_OK, {"rows": moved, "older_than_days": args.days}
+
+
+def cmd_backfill_flows(db, args):
+    progress = _Progress("ledger ids rolled up")
+    done = db.backfill_daily_flows(progress=progress)
+    progress.done()
+    return EXIT_OK if done else EXIT_FAILED, {"complete": done}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bankcli", description="Headless batch jobs for the bank database.")
+    parser.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    parser.add_argument("--pool", type=int, default=DB_POOL_SIZE, help="database connection pool size")
+    parser.add_argument("--json", action="store_true", help="print the summary as one JSON object")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("report", help="bank statistics report")
+    p.add_argument("-o", "--output", help="write the report to a file instead of stdout")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("export-accounts", help="stream accounts to CSV")
+    p.add_argument("file")
+    p.add_argument("--search")
+    p.add_argument("--search-col", choices=("name", "account_number", "emirates_id"))
+    p.add_argument("--status")
+    p.add_argument("--type", help="account type")
+    p.set_defaults(func=cmd_export_accounts)
+
+    p = sub.add_parser("export-transactions", help="stream the ledger to CSV")
+    p.add_argument("file")
+    p.add_argument("--account", type=int)
+    p.add_argument("--from", dest="date_from", type=_date)
+    p.add_argument("--to", dest="date_to", type=_date)
+    p.set_defaults(func=cmd_export_transactions)
+
+    p = sub.add_parser("export-job", help="parallel partitioned ledger export with a manifest")
+    p.add_argument("directory")
+    p.add_argument("--partition-by", choices=("month", "account"), default="month")
+    p.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    p.add_argument("--partitions", type=int)
+    p.add_argument("--workers", type=int, default=EXPORT_WORKERS)
+    p.add_argument("--threads", action="store_true", help="use worker threads instead of processes")
+    p.add_argument("--from", dest="date_from", type=_date)
+    p.add_argument("--to", dest="date_to", type=_date)
+    p.set_defaults(func=cmd_export_job)
+
+    p = sub.add_parser("bulk-transfer", help="transfers from one account, read as to_id,amount[,note] lines")
+    p.add_argument("source", type=int, help="source account id")
+    p.add_argument("file", help="CSV file, or - for stdin")
+    p.add_argument("--best-effort", action="store_true", help="apply valid lines and report the rest")
+    p.add_argument("--dry-run", action="store_true", help="validate only")
+    p.add_argument("--batch-size", type=int, default=0,
+                   help=f"lines per transaction (e.g. {BULK_CHUNK_SIZE}); default is one transaction")
+    p.set_defaults(func=cmd_bulk_transfer)
+
+    p = sub.add_parser("verify-summary", help="compare the summary tables with a recount")
+    p.add_argument("--repair", action="store_true")
+    p.set_defaults(func=cmd_verify_summary)
+
+    p = sub.add_parser("archive", help="move old transactions into the archive table")
+    p.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("backfill-flows", help="roll older ledger history into daily_flows")
+    p.set_defaults(func=cmd_backfill_flows)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.sqlite:
+            db = BankDB(backend="sqlite", sqlite_path=args.sqlite, pool_size=args.pool)
+        else:
+            db = BankDB(pool_size=args.pool)
+    except Exception as e:
+        print(f"bankcli: {e}", file=sys.stderr)
+        return EXIT_NO_DB
+
+    started = time.perf_counter()
+    try:
+        status, summary = args.func(db, args)
+    except Exception as e:
+        status, summary = EXIT_FAILED, {"error": str(e)}
+        print(f"bankcli {args.command}: {e}", file=sys.stderr)
+    finally:
+        db.close()
+    seconds = time.perf_counter() - started
+
+    summary = dict({"command": args.command, "ok": status == EXIT_OK, "seconds": round(seconds, 3)}, **summary)
+    if "rows" in summary:
+        summary["rows_per_sec"] = round(summary["rows"] / seconds, 1) if seconds > 0 else None
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print(" ".join(f"{k}={v}" for k, v in summary.items()))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
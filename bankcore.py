@@ -0,0 +1,2446 @@
+"""Data layer of the bank management system: BankDB, its database backends and helpers.
+
+Kept free of Tk-widget, Matplotlib and HTTP imports so that the customer
+portal, the command-line jobs and export worker processes start quickly;
+bankmanagementsystem.py builds the admin UI on top of it.
+"""
+import os
+import csv
+import json
+import base64
+import gzip
+import io
+import math
+import re
+import sqlite3
+import hashlib
+import logging
+import queue
+import random
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import mysql.connector
+from mysql.connector import IntegrityError as MySQLIntegrityError
+from mysql.connector.constants import ClientFlag
+import migrations
+
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_PASS = "hello"  
+DB_NAME = "bankdb"
+DB_PORT = 3306
+DB_BACKEND = "mysql"      # "mysql" or "sqlite"
+SQLITE_PATH = "bank.db"
+DB_POOL_SIZE = 0          # 0/1 = one shared connection, N > 1 = pool of N connections
+DB_POOL_TIMEOUT = 30      # seconds a thread waits for a free pooled connection
+STATS_CACHE_TTL = 30      # seconds cached dashboard statistics may be reused
+LOGIN_CACHE_TTL = 300     # seconds a verified (identifier, Emirates ID) pair skips the lookup
+LOGIN_CACHE_SIZE = 1024   # verified identities kept for LOGIN_CACHE_TTL
+BULK_CHUNK_SIZE = 500     # ids per IN (...) lookup / rows per multi-row INSERT
+EXPORT_FETCH_SIZE = 5000  # rows per fetchmany() while streaming exports
+EXPORT_WORKERS = os.cpu_count() or 4   # parallel partitions in an export job
+FLOWS_BACKFILL_CHUNK = 50000  # ledger ids rolled into daily_flows per backfill transaction
+ARCHIVE_AFTER_DAYS = 365   # ledger rows older than this move to transactions_archive
+TXN_MAX_RETRIES = 5       # re-runs of a transfer that hit a deadlock / lock wait timeout
+TXN_RETRY_DELAY = 0.02    # seconds; base of the jittered exponential backoff
+ACCOUNT_NUMBER_BLOCK = 50 # account numbers reserved per round trip to the sequences table
+SUMMARY_SLOTS = 8         # bank_summary / daily_flows rows per key, spreads row-lock contention
+BALANCE_BINS = (0, 1000, 5000, 10000, 50000)  # analytics histogram edges; the last bin runs to the top balance
+ANALYTICS_POINTS = 1000   # points kept in the balance-vs-account chart
+
+# duplicate account number / Emirates ID, whichever backend raised it
+IntegrityError = (MySQLIntegrityError, sqlite3.IntegrityError)
+
+ACCOUNT_TYPES = ("Savings", "Current", "Business")
+EMIRATES_ID_RE = re.compile(r'^\d{3}-\d{4}-\d{7}-\d{1}$')
+
+ADMIN_PASSWORD_FILE = "admin.pass"
+LOG_FILE = "bank_operations.log"
+
+logging.basicConfig(filename=LOG_FILE, level=logging.INFO,
+                    format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def load_admin_password_hash():
+    if os.path.exists(ADMIN_PASSWORD_FILE):
+        try:
+            with open(ADMIN_PASSWORD_FILE, "r") as f:
+                return f.read().strip()
+        except Exception:
+            pass
+    return hashlib.sha256("admin123".encode()).hexdigest()
+
+def save_admin_password_hash(h):
+    with open(ADMIN_PASSWORD_FILE, "w") as f:
+        f.write(h)
+
+def sha256_hash(s: str):
+    return hashlib.sha256(s.encode()).hexdigest()
+
+def validate_email(email):
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+def validate_phone(phone):
+    pattern = r'^\+?[0-9]{10,15}$'
+    return re.match(pattern, phone) is not None
+
+
+def _prefix_range(term):
+    """Bounds so that ``col >= lo AND col < hi`` matches every value starting with ``term``.
+
+    Unlike ``LIKE 'term%'`` this is an index range scan on every engine.
+    """
+    return term, term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def _search_words(term):
+    return re.findall(r"\w+", term)
+
+
+class MySQLBackend:
+    """MySQL / MariaDB storage through mysql.connector (the default)."""
+
+    name = "mysql"
+    errors = (mysql.connector.Error,)
+    FT_MIN_TOKEN = 3    # innodb_ft_min_token_size default; shorter words are not indexed
+
+    def __init__(self, host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, port=DB_PORT):
+        self.params = dict(host=host, user=user, password=password, database=database, port=port)
+
+    def spec(self):
+        """(name, kwargs) that rebuild this backend in another process via create_backend."""
+        return self.name, dict(self.params)
+
+    def connect(self):
+        # FOUND_ROWS: rowcount counts matched rows, so an UPDATE that leaves a
+        # row unchanged (e.g. a zero amount within the same second) still succeeds
+        conn = mysql.connector.connect(client_flags=[ClientFlag.FOUND_ROWS], **self.params)
+        conn.autocommit = False
+        return conn
+
+    def ping(self, conn):
+        """Revive a dropped connection; returns True if it had to reconnect."""
+        if conn.is_connected():
+            return False
+        conn.ping(reconnect=True, attempts=3, delay=0.5)
+        return True
+
+    def close(self, conn):
+        if conn.is_connected():
+            conn.close()
+
+    def stream_cursor(self, conn):
+        """Cursor that pulls rows from the server as they are fetched."""
+        return conn.cursor(buffered=False)
+
+    def conflict_kind(self, exc):
+        """'deadlock' / 'lock_timeout' if ``exc`` means the transaction can simply be re-run."""
+        errno = getattr(exc, "errno", None)
+        if errno == 1213:   # ER_LOCK_DEADLOCK
+            return "deadlock"
+        if errno == 1205:   # ER_LOCK_WAIT_TIMEOUT
+            return "lock_timeout"
+        return None
+
+    def is_duplicate(self, exc):
+        """True if ``exc`` is a unique-key violation (not e.g. a NOT NULL one)."""
+        return getattr(exc, "errno", None) == 1062   # ER_DUP_ENTRY
+
+    def add_to_balance(self, cur, acc_id, amount):
+        """Add ``amount`` unless the balance would go negative; returns the new balance or None.
+
+        One statement: LAST_INSERT_ID(expr) hands the new balance (in cents,
+        it only takes integers) back in the OK packet, so no read is needed.
+        """
+        cur.execute("UPDATE accounts SET balance=LAST_INSERT_ID(ROUND((balance+%s)*100))/100, "
+                    "last_transaction_date=NOW() WHERE id=%s AND balance+%s >= 0",
+                    (amount, acc_id, amount))
+        if cur.rowcount != 1:
+            return None
+        return (cur.lastrowid or 0) / 100  # a zero insert id comes back as None
+
+    def upsert_add_sql(self, table, keys, counters, source=None):
+        """INSERT that adds ``counters`` onto an existing row with the same ``keys``."""
+        cols = list(keys) + list(counters)
+        source = source or "VALUES (" + ",".join(["%s"] * len(cols)) + ")"
+        return (f"INSERT INTO {table} ({', '.join(cols)}) {source} ON DUPLICATE KEY UPDATE "
+                + ", ".join(f"{c}={c}+VALUES({c})" for c in counters))
+
+    def ensure_schema(self, conn):
+        """Bring the schema up to date and note whether full-text search is available."""
+        migrations.migrate(conn, self.name)
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA=DATABASE() "
+                        "AND TABLE_NAME='accounts' AND INDEX_NAME='ft_accounts_name' LIMIT 1")
+            self.has_fulltext = cur.fetchone() is not None
+        finally:
+            cur.close()
+
+    def name_search(self, term):
+        """SQL condition matching account names by whole words or word prefixes."""
+        words = _search_words(term)
+        if self.has_fulltext and words and all(len(w) >= self.FT_MIN_TOKEN for w in words):
+            return "MATCH(name) AGAINST (%s IN BOOLEAN MODE)", [" ".join(f"+{w}*" for w in words)]
+        return "name LIKE %s", [term.replace("%", "").replace("_", "") + "%"]
+
+    def reserve_sequence(self, conn, name, count):
+        """Atomically take ``count`` values from a sequence; returns the first one."""
+        cur = conn.cursor()
+        try:
+            cur.execute("UPDATE sequences SET next_value=LAST_INSERT_ID(next_value+%s) WHERE name=%s",
+                        (count, name))
+            if cur.rowcount != 1:
+                raise RuntimeError(f"Unknown sequence '{name}'")
+            cur.execute("SELECT LAST_INSERT_ID()")
+            end = int(cur.fetchone()[0])
+            conn.commit()
+            return end - count
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def describe(self):
+        p = self.params
+        return f"MySQL {p['database']}@{p['host']}:{p['port']}"
+
+
+_SQLITE_DATE_SUB = re.compile(r"DATE_SUB\(\s*NOW\(\)\s*,\s*INTERVAL\s+(\d+)\s+DAY\s*\)", re.I)
+_SQLITE_NOW = re.compile(r"\bNOW\(\)", re.I)
+_SQLITE_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.I)
+
+
+@lru_cache(maxsize=512)
+def _sqlite_sql(sql):
+    """Translate the MySQL dialect BankDB speaks into SQLite.
+
+    Returns ``(sql, lock)`` where ``lock`` says the statement asked for
+    ``FOR UPDATE`` row locks; SQLite has none, so the caller takes the
+    database write lock (``BEGIN IMMEDIATE``) instead.
+    """
+    lock = bool(_SQLITE_FOR_UPDATE.search(sql))
+    if lock:
+        sql = _SQLITE_FOR_UPDATE.sub("", sql)
+    sql = _SQLITE_DATE_SUB.sub(lambda m: f"datetime('now','localtime','-{m.group(1)} days')", sql)
+    sql = _SQLITE_NOW.sub("datetime('now','localtime')", sql)
+    sql = sql.replace("%s", "?").replace("%%", "%")
+    return sql, lock
+
+
+class _SQLiteCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        sql, lock = _sqlite_sql(sql)
+        if lock and not self.connection.in_transaction:
+            super().execute("BEGIN IMMEDIATE")
+        return super().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        sql, _ = _sqlite_sql(sql)
+        return super().executemany(sql, seq_of_params)
+
+
+class _SQLiteConnection(sqlite3.Connection):
+    def cursor(self, factory=_SQLiteCursor):
+        return super().cursor(factory)
+
+
+def _parse_sqlite_timestamp(value):
+    text = value.decode()
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return text
+
+
+class SQLiteBackend:
+    """Embedded single-node storage in a SQLite file (WAL mode)."""
+
+    name = "sqlite"
+    errors = (sqlite3.Error,)
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA foreign_keys=ON",
+        "PRAGMA busy_timeout=10000",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+    )
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        sqlite3.register_converter("TIMESTAMP", _parse_sqlite_timestamp)
+        sqlite3.register_adapter(datetime, lambda d: d.strftime("%Y-%m-%d %H:%M:%S"))
+        sqlite3.register_adapter(Decimal, float)
+        sqlite3.register_adapter(date, date.isoformat)
+        self.has_fulltext = False
+
+    def spec(self):
+        """(name, kwargs) that rebuild this backend in another process via create_backend."""
+        return self.name, {"path": self.path}
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, factory=_SQLiteConnection,
+                               detect_types=sqlite3.PARSE_DECLTYPES,
+                               isolation_level="IMMEDIATE", check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def ensure_schema(self, conn):
+        """Bring the schema up to date and note whether the FTS5 name index exists."""
+        migrations.migrate(conn, self.name)
+        self.has_fulltext = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name='accounts_fts'").fetchone() is not None
+
+    def upsert_add_sql(self, table, keys, counters, source=None):
+        """INSERT that adds ``counters`` onto an existing row with the same ``keys``."""
+        cols = list(keys) + list(counters)
+        source = source or "VALUES (" + ",".join(["%s"] * len(cols)) + ")"
+        return (f"INSERT INTO {table} ({', '.join(cols)}) {source} ON CONFLICT({', '.join(keys)}) DO UPDATE SET "
+                + ", ".join(f"{c}={c}+excluded.{c}" for c in counters))
+
+    def name_search(self, term):
+        """SQL condition matching account names by whole words or word prefixes."""
+        words = _search_words(term)
+        if self.has_fulltext and words:
+            return ("id IN (SELECT rowid FROM accounts_fts WHERE accounts_fts MATCH %s)",
+                    [" ".join(f'"{w}"*' for w in words)])
+        return "name LIKE %s", [term.replace("%", "").replace("_", "") + "%"]
+
+    def ping(self, conn):
+        return False
+
+    def close(self, conn):
+        conn.close()
+
+    def stream_cursor(self, conn):
+        """Cursor that pulls rows from the server as they are fetched."""
+        return conn.cursor()
+
+    def conflict_kind(self, exc):
+        """'deadlock' / 'lock_timeout' if ``exc`` means the transaction can simply be re-run."""
+        if isinstance(exc, sqlite3.OperationalError) and ("locked" in str(exc) or "busy" in str(exc)):
+            return "lock_timeout"
+        return None
+
+    def is_duplicate(self, exc):
+        """True if ``exc`` is a unique-key violation (not e.g. a NOT NULL one)."""
+        return isinstance(exc, sqlite3.IntegrityError) and "UNIQUE constraint failed" in str(exc)
+
+    def add_to_balance(self, cur, acc_id, amount):
+        """Add ``amount`` unless the balance would go negative; returns the new balance or None."""
+        cur.execute("UPDATE accounts SET balance=ROUND(balance+%s, 2), last_transaction_date=NOW() "
+                    "WHERE id=%s AND balance+%s >= 0 RETURNING balance",
+                    (amount, acc_id, amount))
+        row = cur.fetchone()
+        return float(row[0]) if row else None
+
+    def reserve_sequence(self, conn, name, count):
+        """Atomically take ``count`` values from a sequence; returns the first one."""
+        cur = conn.cursor()
+        try:
+            # the UPDATE takes the database write lock, so no other process can interleave
+            cur.execute("UPDATE sequences SET next_value=next_value+%s WHERE name=%s", (count, name))
+            if cur.rowcount != 1:
+                raise RuntimeError(f"Unknown sequence '{name}'")
+            cur.execute("SELECT next_value FROM sequences WHERE name=%s", (name,))
+            end = int(cur.fetchone()[0])
+            conn.commit()
+            return end - count
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def describe(self):
+        return f"SQLite {os.path.abspath(self.path)}"
+
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+
+
+def create_backend(name=DB_BACKEND, **kwargs):
+    """Build a storage backend by name; kwargs go to its constructor."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown database backend '{name}' (expected one of {', '.join(BACKENDS)})")
+    return cls(**kwargs)
+
+
+class ConnectionPool:
+    """Fixed-size pool of database connections.
+
+    Connections are created lazily up to ``size``; a thread that finds the
+    pool exhausted blocks (up to ``timeout`` seconds) until one is released.
+    Every connection is pinged, and reconnected if needed, when handed out.
+    """
+
+    def __init__(self, factory, size, timeout=DB_POOL_TIMEOUT, ping=None):
+        self._factory = factory
+        self._ping = ping
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._reconnects = 0
+
+    def acquire(self):
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise RuntimeError(
+                        f"Timed out after {self.timeout}s waiting for a database connection "
+                        f"(pool size {self.size})")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._check(conn)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            if waited > 0.001:
+                self._waits += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _check(self, conn):
+        """Make sure a connection is alive before handing it out."""
+        if self._ping is not None and self._ping(conn):
+            with self._lock:
+                self._reconnects += 1
+            logging.warning("Pooled database connection was dropped and has been reconnected")
+        return conn
+
+    def release(self, conn):
+        try:
+            if getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except Exception:
+            pass
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pool_size': self.size,
+                'connections_open': self._created,
+                'connections_in_use': self._in_use,
+                'connections_idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': round(self._wait_total, 4),
+                'wait_time_avg': round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+                'wait_time_max': round(self._wait_max, 4),
+                'reconnects': self._reconnects,
+            }
+
+    def close_all(self, close=None):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                (close or (lambda c: c.close()))(conn)
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+
+
+def _with_connection(method):
+    """Run a BankDB method on one connection for its whole duration.
+
+    In pooled mode the calling thread checks a connection out of the pool
+    (nested calls reuse it) and returns it when the outermost call ends.
+    With a single shared connection, calls are serialized instead.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.connection():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _retry_on_conflict(method):
+    """Re-run a self-contained BankDB transaction that lost a deadlock or lock wait.
+
+    The method must roll back on failure (they all do). Attempts are spaced
+    with jittered exponential backoff and counted in :meth:`BankDB.txn_stats`.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        for attempt in range(TXN_MAX_RETRIES + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except self.backend.errors as e:
+                kind = self.backend.conflict_kind(e)
+                if kind is None:
+                    raise
+                gave_up = attempt == TXN_MAX_RETRIES
+                self._count_conflict(kind, gave_up)
+                if gave_up:
+                    logging.error(f"{method.__name__} gave up after {attempt + 1} attempts: {e}")
+                    raise
+                time.sleep(random.uniform(0, TXN_RETRY_DELAY * 2 ** attempt))
+    return wrapper
+
+
+def _encode_cursor(created_at, row_id):
+    """Opaque continuation token for the (created_at, id) position of a row."""
+    ts = created_at.isoformat(sep=" ") if hasattr(created_at, "isoformat") else str(created_at)
+    raw = json.dumps([ts, int(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise ValueError("Invalid page cursor")
+
+
+def _as_datetime(value):
+    """A date bound given as datetime, date or ISO string, as a datetime (None stays None)."""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime(value.year, value.month, value.day)
+
+
+def _stream_rows(backend, sql, params=(), chunk_size=EXPORT_FETCH_SIZE):
+    """Yield result rows in fetchmany() chunks from a dedicated connection.
+
+    The connection is opened just for this query so a long export neither
+    holds a pooled/shared connection nor buffers the result set in memory.
+    """
+    conn = backend.connect()
+    try:
+        cur = backend.stream_cursor(conn)
+        try:
+            cur.execute(sql, tuple(params))
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass  # abandoned mid-stream; the connection is closed below anyway
+    finally:
+        backend.close(conn)
+
+
+class _HashingWriter:
+    """File wrapper that checksums and counts the bytes written through it."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+
+def _lttb(x, y, points):
+    """Largest-Triangle-Three-Buckets downsampling of the series ``x``, ``y``.
+
+    Keeps the first and last point and, from each of ``points - 2`` equal
+    buckets in between, the point forming the largest triangle with the
+    point kept before it and the average of the next bucket, so peaks
+    and dips survive. Returns two NumPy arrays.
+    """
+    import numpy as np
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if points >= n or points < 3:
+        return x, y
+    every = (n - 2) / (points - 2)
+    keep = np.empty(points, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nxt_lo, nxt_hi = hi, min(int((i + 2) * every) + 1, n) if i < points - 3 else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def _json_value(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat(sep=" ") if isinstance(v, datetime) else v.isoformat()
+    if isinstance(v, Decimal):
+        return float(v)
+    return v
+
+
+def _export_partition(spec, queries, path, fmt, columns):
+    """Write one export partition to a gzip file; runs in a worker process or thread.
+
+    ``queries`` is a list of ``(sql, params)`` streamed one after the other
+    (archived rows, then live rows).
+
+    Returns ``{"file", "rows", "bytes", "sha256"}`` for the job manifest.
+    """
+    backend = create_backend(spec[0], **spec[1])
+    rows_written = 0
+    with open(path, "wb") as raw:
+        hashed = _HashingWriter(raw)
+        with gzip.GzipFile(filename=os.path.basename(path)[:-3], mode="wb", fileobj=hashed, mtime=0) as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            if fmt == "csv":
+                w = csv.writer(text)
+                w.writerow(columns)
+                for sql, params in queries:
+                    for rows in _stream_rows(backend, sql, params):
+                        w.writerows(rows)
+                        rows_written += len(rows)
+            else:
+                for sql, params in queries:
+                    for rows in _stream_rows(backend, sql, params):
+                        text.writelines(json.dumps(dict(zip(columns, map(_json_value, r)))) + "\n" for r in rows)
+                        rows_written += len(rows)
+            text.flush()
+            text.detach()
+    return {"file": os.path.basename(path), "rows": rows_written, "bytes": hashed.size,
+            "sha256": hashed.sha256.hexdigest()}
+
+
+class BankDB:
+    def __init__(self, host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, port=DB_PORT,
+                 pool_size=DB_POOL_SIZE, pool_timeout=DB_POOL_TIMEOUT,
+                 backend=DB_BACKEND, sqlite_path=SQLITE_PATH):
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._pool = None
+        self._conn = None
+        self._stats_lock = threading.Lock()
+        self._stats_cache = None
+        self._txn_stats = {'deadlock': 0, 'lock_timeout': 0, 'retries': 0, 'gave_up': 0}
+        self._numbers_lock = threading.Lock()
+        self._numbers = (0, 0)  # reserved account-number block: (next, end)
+        self._login_lock = threading.Lock()
+        self._logins = OrderedDict()  # (identifier, emirates_id) -> (verified at, account id)
+        try:
+            if isinstance(backend, str):
+                if backend == "sqlite":
+                    backend = create_backend(backend, path=sqlite_path)
+                else:
+                    backend = create_backend(backend, host=host, user=user, password=password,
+                                             database=database, port=port)
+            self.backend = backend
+            if pool_size and pool_size > 1:
+                self._pool = ConnectionPool(backend.connect, pool_size, timeout=pool_timeout,
+                                            ping=backend.ping)
+                # open the first connection now so bad credentials fail at startup
+                self._pool.release(self._pool.acquire())
+            else:
+                self._conn = backend.connect()
+            with self.connection() as conn:
+                backend.ensure_schema(conn)
+                self._ensure_summary()
+                self._ensure_account_sequence()
+                self._ensure_daily_flows()
+        except (mysql.connector.Error, sqlite3.Error) as e:
+            raise RuntimeError(f"Database connection failed: {e}")
+
+    @property
+    def conn(self):
+        """The connection the current thread should use.
+
+        Inside a BankDB call this is the connection checked out for it; a
+        thread touching ``conn`` directly in pooled mode keeps its own
+        connection until :meth:`release_connection` is called.
+        """
+        if self._pool is None:
+            return self._conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._pool.acquire()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Hold one connection for the current thread for the duration of the block."""
+        if self._pool is None:
+            with self._lock:
+                yield self._conn
+            return
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            yield self.conn
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.release_connection()
+
+    def release_connection(self):
+        """Return the current thread's pooled connection, if it holds one."""
+        if self._pool is None:
+            return
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            self._pool.release(conn)
+
+    def pool_stats(self):
+        """Pool statistics (wait time, connections in use), or None when not pooled."""
+        return self._pool.stats() if self._pool else None
+
+    def _count_conflict(self, kind, gave_up):
+        with self._stats_lock:
+            self._txn_stats[kind] += 1
+            self._txn_stats['gave_up' if gave_up else 'retries'] += 1
+
+    def txn_stats(self):
+        """Deadlocks / lock wait timeouts seen by retried transfers, and how they ended."""
+        with self._stats_lock:
+            return dict(self._txn_stats)
+
+    def close(self):
+        try:
+            if self._pool is not None:
+                self.release_connection()
+                self._pool.close_all(self.backend.close)
+            else:
+                self.backend.close(self._conn)
+        except Exception:
+            pass
+
+    def _ensure_account_sequence(self):
+        """Seed the account_number sequence past the highest ACnnnnnnnn number in use."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT 1 FROM sequences WHERE name='account_number'")
+            if cur.fetchone():
+                return
+            cur.execute("SELECT account_number FROM accounts WHERE account_number LIKE 'AC________' "
+                        "ORDER BY account_number DESC LIMIT 1")
+            row = cur.fetchone()
+            start = int(row[0][2:]) + 1 if row and row[0][2:].isdigit() else 1
+            cur.execute("INSERT INTO sequences (name, next_value) VALUES ('account_number', %s)", (start,))
+            self.conn.commit()
+        except IntegrityError:
+            self.conn.rollback()  # another process seeded it first
+        finally:
+            cur.close()
+
+    def _allocate_account_numbers(self, count=1):
+        """Hand out ``count`` unique AC%08d numbers.
+
+        Numbers come from a block reserved in the sequences table with one
+        atomic UPDATE, so concurrent creators (threads or processes) never
+        collide and most calls need no round trip. Unused numbers of a block
+        are lost when the process exits, which only leaves gaps.
+        """
+        numbers = []
+        with self._numbers_lock:
+            nxt, end = self._numbers
+            while len(numbers) < count:
+                if nxt >= end:
+                    want = max(ACCOUNT_NUMBER_BLOCK, count - len(numbers))
+                    nxt = self.backend.reserve_sequence(self.conn, "account_number", want)
+                    end = nxt + want
+                take = min(count - len(numbers), end - nxt)
+                numbers.extend(range(nxt, nxt + take))
+                nxt += take
+            self._numbers = (nxt, end)
+        return [f"AC{n:08d}" for n in numbers]
+
+    @_with_connection
+    def add_account(self, name, account_number, emirates_id, balance,
+                    phone, email, account_type):
+        if not EMIRATES_ID_RE.match(emirates_id):
+            raise ValueError("Invalid Emirates ID format (XXX-XXXX-XXXXXXX-X)")
+
+        acct_no = account_number.strip() if account_number and account_number.strip() else None
+        if not acct_no:
+            acct_no = self._allocate_account_numbers()[0]
+
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                """INSERT INTO accounts 
+                   (name, account_number, emirates_id, balance, phone, email, account_type, status, created_at)
+                   VALUES (%s,%s,%s,%s,%s,%s,%s,%s,NOW())""",
+                (name, acct_no, emirates_id, float(balance), phone or None, email or None, account_type, "Active")
+            )
+            last_id = cur.lastrowid
+            self._summary_add(cur, last_id, account_type, "Active", 1, balance)
+            self._openings_add(cur, last_id, 1)
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.info(f"Account created: {acct_no} (id={last_id}) by admin")
+            return last_id, acct_no
+        except IntegrityError as ie:
+            self.conn.rollback()
+            raise
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_with_connection
+    def update_account(self, acc_id, name, account_number, emirates_id, phone, email, account_type, status):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT account_type, status, balance FROM accounts WHERE id=%s FOR UPDATE", (acc_id,))
+            old = cur.fetchone()
+            cur.execute(
+                """UPDATE accounts SET name=%s, account_number=%s, emirates_id=%s,
+                   phone=%s, email=%s, account_type=%s, status=%s, last_transaction_date=last_transaction_date
+                   WHERE id=%s""",
+                (name, account_number, emirates_id, phone or None, email or None, account_type, status, acc_id)
+            )
+            if old and (old[0], old[1]) != (account_type, status):
+                for acc_type, st, n in sorted(((old[0], old[1], -1), (account_type, status, 1))):
+                    self._summary_add(cur, acc_id, acc_type, st, n, n * float(old[2]))
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.info(f"Account updated: id={acc_id} by admin")
+        except IntegrityError:
+            self.conn.rollback()
+            raise
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_with_connection
+    def delete_account(self, acc_id):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT account_type, status, balance FROM accounts WHERE id=%s FOR UPDATE", (acc_id,))
+            old = cur.fetchone()
+            if old:
+                self._summary_add(cur, acc_id, old[0], old[1], -1, -float(old[2]))
+                self._openings_add(cur, acc_id, -1)
+            cur.execute("DELETE FROM accounts WHERE id=%s", (acc_id,))
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.warning(f"Account deleted: id={acc_id} by admin")
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def _account_filters(self, filters):
+        """WHERE conditions and parameters for the get_accounts filter dict."""
+        params = []
+        where = []
+
+        if filters:
+            search = (filters.get("search") or "").strip()
+            if search:
+                cond, cond_params = self._search_condition(search, filters.get("search_col"))
+                where.append(cond); params.extend(cond_params)
+
+            if filters.get("status"):
+                where.append("status=%s"); params.append(filters["status"])
+            if filters.get("account_type"):
+                where.append("account_type=%s"); params.append(filters["account_type"])
+            if filters.get("date_from"):
+                where.append("created_at >= %s"); params.append(filters["date_from"])
+            if filters.get("date_to"):
+                where.append("created_at <= %s"); params.append(filters["date_to"])
+            if filters.get("balance_min"):
+                where.append("balance >= %s"); params.append(filters["balance_min"])
+            if filters.get("balance_max"):
+                where.append("balance <= %s"); params.append(filters["balance_max"])
+
+        return where, params
+
+    def _search_condition(self, term, search_col=None):
+        """Indexed search condition for the accounts search box.
+
+        Names match whole words or word prefixes through the backend's
+        full-text index; account numbers and Emirates IDs match by prefix.
+        With no column given the term's shape picks one: "AC..." is an
+        account number once a digit follows (every number starts with AC,
+        so a bare "Ac" is a name), digits and dashes an Emirates ID, anything
+        else a name.
+        """
+        if search_col not in ("name", "account_number", "emirates_id"):
+            if re.fullmatch(r"(?i)AC\d+", term):
+                search_col = "account_number"
+            elif re.fullmatch(r"[\d-]+", term):
+                search_col = "emirates_id"
+            else:
+                search_col = "name"
+        if search_col == "name":
+            return self.backend.name_search(term)
+        if search_col == "account_number":
+            term = term.upper()
+        return f"({search_col} >= %s AND {search_col} < %s)", list(_prefix_range(term))
+
+    def _account_where(self, filters):
+        where, params = self._account_filters(filters)
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    @_with_connection
+    def get_accounts(self, filters=None, limit=1000):
+        where, params = self._account_where(filters)
+        sql = ("SELECT id, account_number, name, emirates_id, balance, account_type, status, created_at "
+               "FROM accounts" + where + " ORDER BY created_at DESC, id DESC LIMIT %s")
+        params.append(int(limit))
+
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, tuple(params))
+            rows = cur.fetchall()
+            return rows
+        finally:
+            cur.close()
+
+    @_with_connection
+    def count_accounts(self, filters=None):
+        """Number of accounts matching ``filters``.
+
+        With no filters, or only status / account type, the figure comes
+        from the bank_summary rows, so the grid's total costs the same at
+        any table size; other filters count the matching accounts.
+        """
+        where, params = self._account_where(filters)
+        used = {k for k, v in (filters or {}).items() if k != "search_col" and str(v or "").strip()}
+        if used <= {"status", "account_type"}:
+            sql = "SELECT SUM(accounts) FROM bank_summary"
+        else:
+            sql = "SELECT COUNT(*) FROM accounts"
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql + where, tuple(params))
+            return int(cur.fetchone()[0] or 0)
+        finally:
+            cur.close()
+
+    @_with_connection
+    def data_version(self):
+        """Short stamp that changes whenever accounts, balances or the ledger change.
+
+        Built from the newest ledger and account ids, the bank_summary
+        totals and the daily_flows backfill position, all index or
+        tiny-table reads; used to key cached charts.
+        """
+        cur = self.conn.cursor()
+        try:
+            parts = []
+            for table in ("transactions", "accounts"):
+                cur.execute(f"SELECT id FROM {table} ORDER BY id DESC LIMIT 1")
+                row = cur.fetchone()
+                parts.append(row[0] if row else 0)
+            cur.execute("SELECT account_type, status, SUM(accounts), SUM(balance) FROM bank_summary "
+                        "GROUP BY account_type, status ORDER BY account_type, status")
+            parts.extend((t, st, int(n or 0), round(float(b or 0), 2)) for t, st, n, b in cur.fetchall())
+            cur.execute("SELECT position FROM rollup_state WHERE name='daily_flows'")
+            parts.append(cur.fetchone())
+        finally:
+            cur.close()
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    @_with_connection
+    def get_balance_histogram(self, edges=BALANCE_BINS):
+        """Account counts per balance bin, counted by the database.
+
+        Returns ``(edges, counts)``: ``edges`` gains a last edge just above
+        the highest balance, and ``counts[i]`` is the number of accounts with
+        ``edges[i] <= balance < edges[i + 1]`` (negatives in the first bin).
+        """
+        edges = list(edges)
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT balance FROM accounts WHERE balance IS NOT NULL ORDER BY balance DESC LIMIT 1")
+            row = cur.fetchone()
+            if row is None:
+                return edges, []
+            edges.append(max(edges[-1], float(row[0])) * 1.1)
+            bucket = "CASE " + " ".join(f"WHEN balance < %s THEN {i}" for i in range(len(edges) - 2)) \
+                     + f" ELSE {len(edges) - 2} END"
+            cur.execute(f"SELECT {bucket} AS bucket, COUNT(*) FROM accounts WHERE balance IS NOT NULL GROUP BY bucket",
+                        tuple(edges[1:-1]))
+            counts = [0] * (len(edges) - 1)
+            for i, n in cur.fetchall():
+                counts[int(i)] = int(n)
+            return edges, counts
+        finally:
+            cur.close()
+
+    def get_balance_series(self, points=ANALYTICS_POINTS):
+        """Balances in account id order, downsampled with LTTB to at most ``points``.
+
+        Balances are streamed in chunks into a NumPy array, so memory is
+        bounded by one float per account and the chart always gets a fixed
+        number of points. Returns ``(positions, balances)``; positions are
+        1-based indexes in id order.
+        """
+        import numpy as np
+        chunks = [np.fromiter((float(r[0]) for r in rows), dtype=float, count=len(rows))
+                  for rows in _stream_rows(self.backend,
+                                           "SELECT balance FROM accounts WHERE balance IS NOT NULL ORDER BY id")]
+        balances = np.concatenate(chunks) if chunks else np.empty(0)
+        return _lttb(np.arange(1, len(balances) + 1), balances, points)
+
+    @_with_connection
+    def get_account(self, acc_id):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT id, account_number, name, emirates_id, balance, phone, email, account_type, status, created_at FROM accounts WHERE id=%s", (acc_id,))
+            return cur.fetchone()
+        finally:
+            cur.close()
+
+    @_with_connection
+    def find_account_for_login(self, identifier, emirates_id):
+        """Account row for a customer login, or None unless the Emirates ID matches.
+
+        ``identifier`` is an account id or an account number in any case; both are
+        unique-index seeks. Verified pairs are remembered for LOGIN_CACHE_TTL
+        seconds and then only cost a primary-key read, which is re-checked
+        so an edited account number or Emirates ID stops matching at once.
+        """
+        identifier, emirates_id = str(identifier).strip(), str(emirates_id).strip()
+        if not identifier or not emirates_id:
+            return None
+        column = "id" if identifier.isdigit() else "account_number"
+        if column == "account_number":
+            identifier = identifier.upper()
+        key = (identifier, emirates_id)
+        with self._login_lock:
+            hit = self._logins.get(key)
+        if hit and time.monotonic() - hit[0] < LOGIN_CACHE_TTL:
+            acc = self.get_account(hit[1])
+            if acc and str(acc[0 if column == "id" else 1]) == identifier and (acc[3] or "").strip() == emirates_id:
+                return acc
+
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT id, account_number, name, emirates_id, balance, phone, email, account_type, status, created_at "
+                        f"FROM accounts WHERE {column}=%s AND emirates_id=%s",
+                        (int(identifier) if column == "id" else identifier, emirates_id))
+            acc = cur.fetchone()
+        finally:
+            cur.close()
+        with self._login_lock:
+            self._logins.pop(key, None)
+            if acc:
+                self._logins[key] = (time.monotonic(), acc[0])
+                while len(self._logins) > LOGIN_CACHE_SIZE:
+                    self._logins.popitem(last=False)
+        return acc
+
+    @_with_connection
+    def change_balance(self, acc_id, amount, trans_type="manual", note=None, commit=True, receipt=False):
+        """Add ``amount`` to an account. With commit=False the caller owns the transaction.
+
+        The balance is changed by one guarded ``balance = balance + amount``
+        UPDATE (no SELECT ... FOR UPDATE first), so the row lock is only held
+        for the ledger/summary inserts and the commit that follow. Returns
+        the new balance, or ``(new balance, ledger row)`` with receipt=True.
+
+        The summary, ledger and flows writes are still separate statements
+        after the UPDATE: sending them in one packet would need MySQL's
+        CLIENT_MULTI_STATEMENTS on every pooled connection, and SQLite has
+        no round trips to save.
+        """
+        amount = round(float(amount), 2)
+        cur = self.conn.cursor()
+        try:
+            new_bal = self.backend.add_to_balance(cur, acc_id, amount)
+            if new_bal is None:
+                cur.execute("SELECT 1 FROM accounts WHERE id=%s", (acc_id,))
+                raise ValueError("Insufficient funds" if cur.fetchone() else "Account not found")
+            cur.execute(self.backend.upsert_add_sql(
+                            "bank_summary", ("account_type", "status", "slot"), ("accounts", "balance"),
+                            source="SELECT account_type, status, %s, 0, %s FROM accounts WHERE id=%s"),
+                        (int(acc_id) % SUMMARY_SLOTS, amount, acc_id))
+            cur.execute(
+                "INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
+                (acc_id, amount, trans_type, note)
+            )
+            self._flows_add(cur, acc_id, trans_type, amount)
+            row = self._latest_transaction(cur, acc_id) if receipt else None
+            if commit:
+                self.conn.commit()
+                self._invalidate_stats()
+            logging.info(f"Balance changed for account id={acc_id}: {amount:+.2f} new={new_bal:.2f}")
+            return (new_bal, row) if receipt else new_bal
+        except Exception:
+            if commit:
+                self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_with_connection
+    def get_transactions(self, acc_id=None, limit=200, date_from=None, date_to=None):
+        """Newest-first ledger rows, continuing into the archive when the live table runs out."""
+        where, params = self._transaction_where(acc_id, date_from, date_to)
+        where = " WHERE " + " AND ".join(where) if where else ""
+        rows = []
+        cur = self.conn.cursor()
+        try:
+            # archived rows are all older than live ones, so the live table comes first
+            for table in reversed(self._transaction_tables(date_from)):
+                cur.execute(f"SELECT {', '.join(self.TRANSACTION_COLUMNS)} FROM {table}{where} "
+                            "ORDER BY created_at DESC, id DESC LIMIT %s", tuple(params + [limit - len(rows)]))
+                rows.extend(cur.fetchall())
+                if len(rows) >= limit:
+                    break
+            return rows
+        except Exception:
+            return []
+        finally:
+            cur.close()
+
+    @_with_connection
+    def get_transactions_since(self, acc_id, last_id, limit=200):
+        """Ledger rows of an account with ``id > last_id``, newest first.
+
+        A high-water-mark read for views that already show everything up
+        to ``last_id``; a full ``limit`` means there may be more to fetch.
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"SELECT {', '.join(self.TRANSACTION_COLUMNS)} FROM transactions "
+                        "WHERE account_id=%s AND id > %s ORDER BY id DESC LIMIT %s", (acc_id, last_id or 0, limit))
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def _latest_transaction(self, cur, acc_id):
+        """The account's newest ledger row; inside a write that still holds its row lock, the one just inserted."""
+        cur.execute(f"SELECT {', '.join(self.TRANSACTION_COLUMNS)} FROM transactions "
+                    "WHERE account_id=%s ORDER BY id DESC LIMIT 1", (acc_id,))
+        return cur.fetchone()
+
+    def _transaction_where(self, acc_id=None, date_from=None, date_to=None):
+        where, params = [], []
+        if acc_id:
+            where.append("account_id=%s"); params.append(acc_id)
+        if date_from:
+            where.append("created_at >= %s"); params.append(date_from)
+        if date_to:
+            where.append("created_at <= %s"); params.append(date_to)
+        return where, params
+
+    def _transaction_tables(self, date_from=None):
+        """Tables a ledger read starting at ``date_from`` must cover, oldest first.
+
+        The archive is only consulted when it holds rows at or after
+        ``date_from`` (or there is no lower bound).
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT created_at FROM transactions_archive ORDER BY created_at DESC LIMIT 1")
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        if row is None:
+            return ["transactions"]
+        if date_from:
+            if row[0] is not None and _as_datetime(date_from) > _as_datetime(row[0]):
+                return ["transactions"]
+        return ["transactions_archive", "transactions"]
+
+    def archive_transactions(self, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=BULK_CHUNK_SIZE, progress=None):
+        """Move ledger rows older than ``older_than_days`` into transactions_archive.
+
+        Rows move oldest first in batches, each its own short transaction, so
+        tellers and clients keep working while a large backlog is archived.
+        Reads (get_transactions, pages, exports) still see archived rows.
+        ``progress(rows_moved)`` is called after each batch. Returns rows moved.
+        """
+        cutoff = datetime.now() - timedelta(days=int(older_than_days))
+        cols = ", ".join(self.TRANSACTION_COLUMNS)
+        moved = 0
+        while True:
+            with self.connection() as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute("SELECT id FROM transactions WHERE created_at < %s ORDER BY created_at, id LIMIT %s",
+                                (cutoff, int(batch_size)))
+                    ids = [r[0] for r in cur.fetchall()]
+                    if not ids:
+                        break
+                    marks = ",".join(["%s"] * len(ids))
+                    cur.execute(f"INSERT INTO transactions_archive ({cols}) "
+                                f"SELECT {cols} FROM transactions WHERE id IN ({marks})", tuple(ids))
+                    cur.execute(f"DELETE FROM transactions WHERE id IN ({marks})", tuple(ids))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cur.close()
+            moved += len(ids)
+            if progress:
+                progress(moved)
+        logging.info(f"Archived {moved} transactions older than {cutoff:%Y-%m-%d}")
+        return moved
+
+    def _summary_add(self, cur, acc_id, account_type, status, accounts, balance):
+        """Apply a change to the bank_summary totals inside the caller's transaction."""
+        cur.execute(self.backend.upsert_add_sql("bank_summary", ("account_type", "status", "slot"),
+                                                ("accounts", "balance")),
+                    (account_type, status, int(acc_id) % SUMMARY_SLOTS, accounts, round(float(balance), 2)))
+
+    def _openings_add(self, cur, acc_id, accounts):
+        """Count an account in (or out of) the openings bucket for its creation day."""
+        cur.execute(self.backend.upsert_add_sql(
+                        "account_openings", ("day",), ("accounts",),
+                        source="SELECT DATE(created_at), %s FROM accounts WHERE id=%s AND created_at IS NOT NULL"),
+                    (accounts, acc_id))
+
+    FLOW_COLUMNS = ("deposits", "withdrawals", "transfers_in", "transfers_out",
+                    "loan_disbursements", "debt_payments")
+    # ledger type -> daily_flows column; other types only count towards ``transactions``
+    FLOW_TYPES = {"deposit": "deposits", "withdraw": "withdrawals", "withdrawal": "withdrawals",
+                  "transfer_in": "transfers_in", "transfer_out": "transfers_out",
+                  "loan_disbursement": "loan_disbursements", "debt_payment": "debt_payments"}
+
+    def _flows_sql(self, source=None):
+        return self.backend.upsert_add_sql("daily_flows", ("day", "account_type", "slot"),
+                                           self.FLOW_COLUMNS + ("transactions",), source=source)
+
+    def _flows_row(self, account_type, slot, trans_type, amount, count=1):
+        column = self.FLOW_TYPES.get(trans_type)
+        amount = round(abs(float(amount)), 2)
+        return ((date.today(), account_type, slot)
+                + tuple(amount if c == column else 0 for c in self.FLOW_COLUMNS) + (count,))
+
+    def _flows_add(self, cur, acc_id, trans_type, amount, account_type=None):
+        """Count one ledger row in today's daily_flows bucket inside the caller's transaction.
+
+        Buckets are spread over SUMMARY_SLOTS rows by account id, like
+        bank_summary, so writes to different accounts rarely share a row lock.
+        """
+        row = self._flows_row(account_type, int(acc_id) % SUMMARY_SLOTS, trans_type, amount)
+        if account_type is not None:
+            cur.execute(self._flows_sql(), row)
+            return
+        marks = ", ".join(["%s"] * (len(row) - 3))
+        cur.execute(self._flows_sql(f"SELECT %s, account_type, %s, {marks} FROM accounts WHERE id=%s"),
+                    (row[0], row[2]) + row[3:] + (acc_id,))
+
+    def _ensure_daily_flows(self):
+        """Record which ledger ids predate daily_flows so the backfill knows where to stop.
+
+        Rows written from now on are counted as they are inserted; rows up
+        to the current highest id are rolled up by backfill_daily_flows().
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT 1 FROM rollup_state WHERE name='daily_flows'")
+            if cur.fetchone():
+                return
+            upto = 0
+            for table in ("transactions", "transactions_archive"):
+                cur.execute(f"SELECT id FROM {table} ORDER BY id DESC LIMIT 1")
+                row = cur.fetchone()
+                upto = max(upto, row[0] if row else 0)
+            cur.execute("INSERT INTO rollup_state (name, position, upto) VALUES ('daily_flows', 0, %s)", (upto,))
+            self.conn.commit()
+        except IntegrityError:
+            self.conn.rollback()  # another process seeded it first
+        finally:
+            cur.close()
+
+    def backfill_daily_flows(self, chunk_size=FLOWS_BACKFILL_CHUNK, progress=None):
+        """Roll ledger history that predates daily_flows into it, one id range per transaction.
+
+        Resumable: the position is committed with each chunk, so an
+        interrupted backfill continues where it stopped. ``progress(position,
+        upto)`` is called after each chunk. Returns True once complete.
+        """
+        sums = ", ".join(
+            f"SUM(CASE WHEN t.type IN ({', '.join(repr(k) for k, c in self.FLOW_TYPES.items() if c == col)}) "
+            f"THEN ABS(t.amount) ELSE 0 END)" for col in self.FLOW_COLUMNS)
+        while True:
+            with self.connection() as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute("SELECT position, upto FROM rollup_state WHERE name='daily_flows' FOR UPDATE")
+                    row = cur.fetchone()
+                    if row is None or row[0] >= row[1]:
+                        conn.rollback()
+                        return row is not None
+                    position, upto = row
+                    end = min(position + int(chunk_size), upto)
+                    for table in ("transactions_archive", "transactions"):
+                        # deleted accounts keep their history under 'Closed'
+                        cur.execute(self._flows_sql(
+                            f"SELECT DATE(t.created_at), COALESCE(a.account_type, 'Closed'), 0, {sums}, COUNT(*) "
+                            f"FROM {table} t LEFT JOIN accounts a ON a.id = t.account_id "
+                            f"WHERE t.id > %s AND t.id <= %s AND t.created_at IS NOT NULL "
+                            f"GROUP BY DATE(t.created_at), COALESCE(a.account_type, 'Closed')"),
+                            (position, end))
+                    cur.execute("UPDATE rollup_state SET position=%s WHERE name='daily_flows'", (end,))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cur.close()
+            if progress:
+                progress(end, upto)
+
+    @_with_connection
+    def flows_backfill_pending(self):
+        """True while ledger history older than daily_flows has not been rolled up yet."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT position, upto FROM rollup_state WHERE name='daily_flows'")
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        return row is not None and row[0] < row[1]
+
+    @_with_connection
+    def get_daily_flows(self, date_from=None, date_to=None, account_type=None, period="day"):
+        """Cash flow per day (or per ``period="month"``) from the daily_flows rollup.
+
+        Returns ``[(period_start, {column: amount, ..., "transactions": n})]``
+        in date order. History older than the rollup only shows once
+        backfill_daily_flows() has run.
+        """
+        cols = self.FLOW_COLUMNS + ("transactions",)
+        where, params = [], []
+        if date_from:
+            where.append("day >= %s"); params.append(date_from)
+        if date_to:
+            where.append("day <= %s"); params.append(date_to)
+        if account_type:
+            where.append("account_type=%s"); params.append(account_type)
+        # SUM also folds the per-slot rows of a day together
+        sql = "SELECT day, " + ", ".join(f"SUM({c})" for c in cols) + " FROM daily_flows"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY day ORDER BY day"
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, tuple(params))
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+
+        flows = OrderedDict()
+        for day, *values in rows:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            key = day.replace(day=1) if period == "month" else day
+            totals = flows.setdefault(key, dict.fromkeys(cols, 0))
+            for c, v in zip(cols, values):
+                totals[c] += float(v or 0) if c != "transactions" else int(v or 0)
+        return list(flows.items())
+
+    def _ensure_summary(self):
+        """Build the summary tables the first time they are used on existing data."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT 1 FROM bank_summary LIMIT 1")
+            empty_summary = cur.fetchone() is None
+            cur.execute("SELECT 1 FROM accounts LIMIT 1")
+            has_accounts = cur.fetchone() is not None
+        finally:
+            cur.close()
+        if empty_summary and has_accounts:
+            logging.info("Building bank summary from accounts")
+            self.rebuild_summary()
+
+    def _summary_from_accounts(self, cur):
+        cur.execute("SELECT account_type, status, COUNT(*), SUM(balance) FROM accounts GROUP BY account_type, status")
+        actual = {(t, st): (int(n), round(float(b or 0), 2)) for t, st, n, b in cur.fetchall()}
+        cur.execute("SELECT DATE(created_at), COUNT(*) FROM accounts WHERE created_at IS NOT NULL GROUP BY DATE(created_at)")
+        openings = {str(d): int(n) for d, n in cur.fetchall()}
+        return actual, openings
+
+    @_with_connection
+    def rebuild_summary(self):
+        """Recompute bank_summary and account_openings from the accounts table."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT COUNT(*) FROM accounts FOR UPDATE")
+            cur.fetchall()
+            cur.execute("DELETE FROM bank_summary")
+            cur.execute(f"INSERT INTO bank_summary (account_type, status, slot, accounts, balance) "
+                        f"SELECT account_type, status, id % {SUMMARY_SLOTS}, COUNT(*), SUM(balance) "
+                        f"FROM accounts GROUP BY account_type, status, id % {SUMMARY_SLOTS}")
+            cur.execute("DELETE FROM account_openings")
+            cur.execute("INSERT INTO account_openings (day, accounts) "
+                        "SELECT DATE(created_at), COUNT(*) FROM accounts "
+                        "WHERE created_at IS NOT NULL GROUP BY DATE(created_at)")
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.warning("Bank summary rebuilt from accounts")
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_with_connection
+    def verify_summary(self, repair=False):
+        """Compare the summary tables with a full recount of accounts.
+
+        Returns a list of drift entries (empty when everything matches). With
+        repair=True the summary is rebuilt after reporting.
+        """
+        cur = self.conn.cursor()
+        try:
+            actual, actual_openings = self._summary_from_accounts(cur)
+            cur.execute("SELECT account_type, status, SUM(accounts), SUM(balance) "
+                        "FROM bank_summary GROUP BY account_type, status")
+            stored = {(t, st): (int(n or 0), round(float(b or 0), 2)) for t, st, n, b in cur.fetchall()}
+            cur.execute("SELECT day, accounts FROM account_openings")
+            stored_openings = {str(d): int(n) for d, n in cur.fetchall()}
+        finally:
+            cur.close()
+
+        drift = []
+        for key in sorted(set(actual) | set(stored), key=str):
+            want, have = actual.get(key, (0, 0.0)), stored.get(key, (0, 0.0))
+            if want[0] != have[0] or abs(want[1] - have[1]) >= 0.01:
+                drift.append({'account_type': key[0], 'status': key[1],
+                              'accounts': have[0], 'expected_accounts': want[0],
+                              'balance': have[1], 'expected_balance': want[1]})
+        for day in sorted(set(actual_openings) | set(stored_openings)):
+            want, have = actual_openings.get(day, 0), stored_openings.get(day, 0)
+            if want != have:
+                drift.append({'day': day, 'accounts_opened': have, 'expected_accounts_opened': want})
+
+        if drift:
+            logging.warning(f"Bank summary drift found in {len(drift)} entries")
+            if repair:
+                self.rebuild_summary()
+        return drift
+
+    def _invalidate_stats(self):
+        """Called by every write that can move the dashboard numbers."""
+        with self._stats_lock:
+            self._stats_cache = None
+
+    @_with_connection
+    def get_statistics(self, fresh=False):
+        """Return the bank statistics used by the dashboard, report and analytics.
+
+        Figures are read from the bank_summary / account_openings tables,
+        which the write methods keep current, so the cost does not grow with
+        the number of accounts. The result is also cached until a BankDB
+        write invalidates it, or for STATS_CACHE_TTL seconds to pick up
+        writes made by other processes.
+        """
+        with self._stats_lock:
+            cached = self._stats_cache
+        if cached and not fresh and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+            return dict(cached[1], by_type=dict(cached[1]['by_type']))
+
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT account_type, status, SUM(accounts), SUM(balance) "
+                        "FROM bank_summary GROUP BY account_type, status")
+            rows = cur.fetchall()
+            cur.execute("SELECT SUM(accounts) FROM account_openings WHERE day > %s",
+                        (date.today() - timedelta(days=30),))
+            new_30d = cur.fetchone()[0]
+        finally:
+            cur.close()
+
+        stats = {'total_accounts': 0, 'total_balance': 0.0, 'avg_balance': 0.0,
+                 'frozen_accounts': 0, 'new_accounts_30d': int(new_30d or 0), 'by_type': {}}
+        for acc_type, status, count, total in rows:
+            count = int(count or 0)
+            if not count:
+                continue
+            if status == 'Active':
+                stats['total_accounts'] += count
+                stats['total_balance'] += float(total or 0)
+            elif status == 'Frozen':
+                stats['frozen_accounts'] += count
+            stats['by_type'][acc_type] = stats['by_type'].get(acc_type, 0) + count
+        if stats['total_accounts']:
+            stats['avg_balance'] = stats['total_balance'] / stats['total_accounts']
+
+        with self._stats_lock:
+            self._stats_cache = (time.monotonic(), stats)
+        return dict(stats, by_type=dict(stats['by_type']))
+
+    def _stream_csv(self, filename, headers, queries, progress=None, format_row=None):
+        """Write the rows of each ``(sql, params)`` in ``queries``, in order, to one CSV."""
+        written = 0
+        with open(filename, "w", newline='', encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(headers)
+            for sql, params in queries:
+                for rows in _stream_rows(self.backend, sql, params):
+                    w.writerows(map(format_row, rows) if format_row else rows)
+                    written += len(rows)
+                    if progress:
+                        progress(written)
+        return written
+
+    def export_accounts_csv(self, filename, filters=None, progress=None):
+        """Stream every matching account to CSV; returns the row count.
+
+        ``progress(rows_written)`` is called after each fetched chunk.
+        """
+        where, params = self._account_where(filters)
+        sql = ("SELECT id, account_number, name, emirates_id, balance, account_type, status, created_at "
+               "FROM accounts" + where + " ORDER BY id")
+        headers = ["id", "account_number", "name", "emirates_id", "balance", "account_type", "status", "created_at"]
+
+        def fmt(r):
+            r = list(r)
+            try:
+                r[4] = f"{float(r[4]):.2f}"
+            except Exception:
+                pass
+            return r
+
+        written = self._stream_csv(filename, headers, [(sql, params)], progress, fmt)
+        logging.info(f"Accounts exported to CSV: {filename} ({written} rows)")
+        return written
+
+    def export_transactions_csv(self, filename, acc_id=None, date_from=None, date_to=None, progress=None):
+        """Stream the ledger (optionally one account / date range) to CSV; returns the row count.
+
+        Archived rows are included when the range reaches back past the
+        archive horizon; they come first, so the file stays in id order.
+        """
+        where, params = self._transaction_where(acc_id, date_from, date_to)
+        where = " WHERE " + " AND ".join(where) if where else ""
+        tables = self._transaction_tables(date_from)
+        queries = [(f"SELECT {', '.join(self.TRANSACTION_COLUMNS)} FROM {table}{where} ORDER BY id", params)
+                   for table in tables]
+        written = self._stream_csv(filename, list(self.TRANSACTION_COLUMNS), queries, progress)
+        logging.info(f"Transactions exported to CSV: {filename} ({written} rows)")
+        return written
+
+    TRANSACTION_COLUMNS = ("id", "account_id", "amount", "type", "note", "created_at")
+
+    @_with_connection
+    def _transaction_partitions(self, partition_by, partitions, date_from=None, date_to=None):
+        """Split the ledger into (label, WHERE clause, params) ranges.
+
+        Month partitions only cover months that hold ledger rows: each one
+        is found by seeking the created_at index past the previous month.
+        """
+        if partition_by not in ("month", "account"):
+            raise ValueError("partition_by must be 'month' or 'account'")
+        date_from, date_to = _as_datetime(date_from), _as_datetime(date_to)
+        tables = self._transaction_tables(date_from)
+        parts = []
+        cur = self.conn.cursor()
+        try:
+            if partition_by == "month":
+                highs = []
+                for table in tables:
+                    # ORDER BY keeps the column type (MAX() loses it on SQLite)
+                    cur.execute(f"SELECT created_at FROM {table} WHERE created_at IS NOT NULL "
+                                "ORDER BY created_at DESC LIMIT 1")
+                    row = cur.fetchone()
+                    if row:
+                        highs.append(_as_datetime(row[0]))
+                if not highs:
+                    return []
+                hi = min(max(highs), date_to or max(highs))
+                seek = date_from
+                while True:
+                    found = []
+                    for table in tables:
+                        if seek is None:
+                            cur.execute(f"SELECT created_at FROM {table} WHERE created_at IS NOT NULL "
+                                        "ORDER BY created_at LIMIT 1")
+                        else:
+                            cur.execute(f"SELECT created_at FROM {table} WHERE created_at >= %s "
+                                        "ORDER BY created_at LIMIT 1", (seek,))
+                        row = cur.fetchone()
+                        if row:
+                            found.append(_as_datetime(row[0]))
+                    if not found or min(found) > hi:
+                        break
+                    first = min(found)
+                    month = datetime(first.year, first.month, 1)
+                    nxt = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+                    start, end = max(month, date_from or month), min(nxt, hi + timedelta(seconds=1))
+                    parts.append((month.strftime("%Y-%m"), "created_at >= %s AND created_at < %s", [start, end]))
+                    seek = nxt
+                return parts
+
+            lows, highs = [], []
+            for table in tables:
+                cur.execute(f"SELECT MIN(account_id), MAX(account_id) FROM {table}")
+                row = cur.fetchone()
+                if row[0] is not None:
+                    lows.append(row[0]); highs.append(row[1])
+        finally:
+            cur.close()
+        if not lows:
+            return []
+        lo, hi = min(lows), max(highs)
+
+        partitions = max(1, int(partitions or EXPORT_WORKERS))
+        step = -(-(int(hi) - int(lo) + 1) // partitions)
+        for first in range(int(lo), int(hi) + 1, step):
+            last = min(first + step - 1, int(hi))
+            parts.append((f"acc{first}-{last}", "account_id BETWEEN %s AND %s", [first, last]))
+        if date_from:
+            parts = [(l, w + " AND created_at >= %s", p + [date_from]) for l, w, p in parts]
+        if date_to:
+            parts = [(l, w + " AND created_at <= %s", p + [date_to]) for l, w, p in parts]
+        return parts
+
+    def export_transactions_job(self, directory, partition_by="month", fmt="csv", partitions=None,
+                                workers=EXPORT_WORKERS, date_from=None, date_to=None,
+                                processes=True, progress=None):
+        """Export the ledger as parallel, gzip-compressed partitions plus a manifest.
+
+        The ledger is split by calendar month or into ``partitions`` equal
+        account-id ranges. Each partition is streamed by its own worker (a
+        separate process by default, so CSV/JSON encoding and compression use
+        all cores) to ``transactions_<range>.<csv|jsonl>.gz``. manifest.json
+        lists every file with its row count, size and SHA-256.
+
+        ``progress(done, total)`` is called as partitions finish. Returns the
+        manifest dict.
+        """
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError("fmt must be 'csv' or 'jsonl'")
+        started = time.perf_counter()
+        os.makedirs(directory, exist_ok=True)
+        parts = self._transaction_partitions(partition_by, partitions, date_from, date_to)
+        tables = self._transaction_tables(date_from)
+        select = "SELECT " + ", ".join(self.TRANSACTION_COLUMNS) + " FROM {} WHERE "
+
+        if processes:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bankdb-export")
+        files = []
+        with pool:
+            futures = {pool.submit(_export_partition, self.backend.spec(),
+                                   [(select.format(t) + where + " ORDER BY id", params) for t in tables],
+                                   os.path.join(directory, f"transactions_{label}.{fmt}.gz"), fmt,
+                                   self.TRANSACTION_COLUMNS): (label, params)
+                       for label, where, params in parts}
+            for done, fut in enumerate(as_completed(futures), start=1):
+                label, params = futures[fut]
+                files.append(dict(fut.result(), partition=label,
+                                  range=[_json_value(v) for v in params[:2]]))
+                if progress:
+                    progress(done, len(parts))
+
+        files.sort(key=lambda f: f["file"])
+        manifest = {
+            "table": "transactions",
+            "format": fmt,
+            "compression": "gzip",
+            "partition_by": partition_by,
+            "columns": list(self.TRANSACTION_COLUMNS),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - started, 3),
+            "total_rows": sum(f["rows"] for f in files),
+            "files": files,
+        }
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        logging.info(f"Transaction export job to {directory}: {len(files)} partitions, "
+                     f"{manifest['total_rows']} rows in {manifest['seconds']}s")
+        return manifest
+
+    IMPORT_COLUMNS = ("name", "emirates_id", "balance", "phone", "email", "account_type", "account_number")
+
+    def _validate_import_row(self, row):
+        """Normalise one CSV row for import_accounts_csv; raises ValueError if it is unusable."""
+        name = (row.get("name") or "").strip()
+        eid = (row.get("emirates_id") or "").strip()
+        phone = (row.get("phone") or "").strip()
+        email = (row.get("email") or "").strip()
+        account_type = (row.get("account_type") or "Savings").strip() or "Savings"
+        account_number = (row.get("account_number") or "").strip().upper()
+        if not name:
+            raise ValueError("Name is required")
+        if not EMIRATES_ID_RE.match(eid):
+            raise ValueError("Invalid Emirates ID format (XXX-XXXX-XXXXXXX-X)")
+        if email and not validate_email(email):
+            raise ValueError("Invalid email address")
+        if phone and not validate_phone(phone):
+            raise ValueError("Invalid phone number")
+        if account_type not in ACCOUNT_TYPES:
+            raise ValueError(f"Unknown account type '{account_type}'")
+        try:
+            balance = round(float((row.get("balance") or "0").strip() or 0), 2)
+        except ValueError:
+            raise ValueError("Balance must be a number")
+        if not math.isfinite(balance):
+            raise ValueError("Balance must be a finite number")
+        if balance < 0:
+            raise ValueError("Balance cannot be negative")
+        return [name, account_number or None, eid, balance, phone or None, email or None, account_type]
+
+    def _existing_keys(self, cur, column, values):
+        found = set()
+        values = sorted(v for v in values if v)
+        for i in range(0, len(values), BULK_CHUNK_SIZE):
+            chunk = values[i:i + BULK_CHUNK_SIZE]
+            cur.execute(f"SELECT {column} FROM accounts WHERE {column} IN ({','.join(['%s'] * len(chunk))})",
+                        tuple(chunk))
+            found.update(r[0] for r in cur.fetchall())
+        return found
+
+    def _insert_account_chunk(self, cur, rows, created_at):
+        """Multi-row INSERT of validated import rows; ids come from AUTO_INCREMENT.
+
+        The summary slots depend on the new ids, so the bank_summary deltas
+        are aggregated from the inserted rows, found by their account numbers.
+        """
+        numbers = iter(self._allocate_account_numbers(sum(1 for r in rows if not r[1])))
+        values = [(name, acct_no or next(numbers), eid, balance, phone, email, account_type, "Active", created_at)
+                  for name, acct_no, eid, balance, phone, email, account_type in rows]
+        cur.execute("INSERT INTO accounts (name, account_number, emirates_id, balance, phone, email, "
+                    "account_type, status, created_at) VALUES "
+                    + ",".join(["(%s,%s,%s,%s,%s,%s,%s,%s,%s)"] * len(values)),
+                    tuple(v for row in values for v in row))
+        cur.execute(self.backend.upsert_add_sql(
+                        "bank_summary", ("account_type", "status", "slot"), ("accounts", "balance"),
+                        source=f"SELECT account_type, status, id % {SUMMARY_SLOTS}, COUNT(*), SUM(balance) "
+                               f"FROM accounts WHERE account_number IN ({','.join(['%s'] * len(values))}) "
+                               f"GROUP BY account_type, status, id % {SUMMARY_SLOTS} "
+                               f"ORDER BY account_type, status, id % {SUMMARY_SLOTS}"),
+                    tuple(v[1] for v in values))
+        cur.execute(self.backend.upsert_add_sql("account_openings", ("day",), ("accounts",)),
+                    (created_at.date(), len(values)))
+
+    @_with_connection
+    def import_accounts_csv(self, filename, chunk_size=BULK_CHUNK_SIZE, progress=None):
+        """Bulk-create accounts from a CSV file with a header row.
+
+        Recognised columns are IMPORT_COLUMNS; name and emirates_id are
+        required, account_number is generated when blank. Rows are validated
+        in batches (format, duplicates in the file and in the database) and
+        inserted with multi-row INSERTs, committing once per chunk.
+        ``progress(done, total)`` is called after each chunk.
+
+        Returns a dict with ``imported``, ``rejected`` (list of
+        ``(line_number, row, error)``), ``seconds`` and ``rows_per_sec``.
+        """
+        started = time.perf_counter()
+        with open(filename, newline='', encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or not {"name", "emirates_id"} <= {c.strip().lower() for c in reader.fieldnames}:
+                raise ValueError("CSV must have a header row with at least name and emirates_id columns")
+            raw = [(ln, {(k or "").strip().lower(): v for k, v in row.items()})
+                   for ln, row in enumerate(reader, start=2)]
+
+        rejected, valid = [], []
+        seen_eids, seen_numbers = set(), set()
+        for ln, row in raw:
+            try:
+                rec = self._validate_import_row(row)
+                if rec[2] in seen_eids:
+                    raise ValueError("Emirates ID repeated in file")
+                if rec[1] and rec[1] in seen_numbers:
+                    raise ValueError("Account number repeated in file")
+            except ValueError as e:
+                rejected.append((ln, row, str(e)))
+                continue
+            seen_eids.add(rec[2])
+            if rec[1]:
+                seen_numbers.add(rec[1])
+            valid.append((ln, row, rec))
+
+        imported = 0
+        cur = self.conn.cursor()
+        try:
+            for i in range(0, len(valid), chunk_size):
+                chunk = valid[i:i + chunk_size]
+                taken_eids = self._existing_keys(cur, "emirates_id", [rec[2] for _, _, rec in chunk])
+                taken_numbers = self._existing_keys(cur, "account_number", [rec[1] for _, _, rec in chunk])
+                batch = []
+                for ln, row, rec in chunk:
+                    if rec[2] in taken_eids:
+                        rejected.append((ln, row, "Emirates ID already exists"))
+                    elif rec[1] in taken_numbers:
+                        rejected.append((ln, row, "Account number already exists"))
+                    else:
+                        batch.append((ln, row, rec))
+                if batch:
+                    try:
+                        self._insert_account_chunk(cur, [rec for _, _, rec in batch], datetime.now().replace(microsecond=0))
+                        self.conn.commit()
+                        imported += len(batch)
+                    except IntegrityError:
+                        # raced with another writer: retry row by row to isolate the offenders
+                        self.conn.rollback()
+                        for ln, row, rec in batch:
+                            try:
+                                self._insert_account_chunk(cur, [rec], datetime.now().replace(microsecond=0))
+                                self.conn.commit()
+                                imported += 1
+                            except IntegrityError as e:
+                                self.conn.rollback()
+                                label = "Duplicate" if self.backend.is_duplicate(e) else "Rejected by the database"
+                                rejected.append((ln, row, f"{label}: {e}"))
+                if progress:
+                    progress(min(i + chunk_size, len(valid)), len(valid))
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+            if imported:
+                self._invalidate_stats()
+
+        seconds = time.perf_counter() - started
+        rejected.sort(key=lambda r: r[0])
+        rate = imported / seconds if seconds > 0 else 0.0
+        logging.info(f"Imported {imported} accounts from {filename} in {seconds:.2f}s "
+                     f"({rate:,.0f} rows/s), {len(rejected)} rejected")
+        return {'imported': imported, 'rejected': rejected, 'seconds': seconds, 'rows_per_sec': rate}
+
+    @_retry_on_conflict
+    @_with_connection
+    def transfer_funds(self, from_acc_id, to_acc_id, amount, note=None, receipt=False):
+        """Transfer funds between accounts.
+
+        Both rows are locked by one SELECT in id order, so opposite
+        transfers between the same pair cannot deadlock each other; any
+        other deadlock or lock wait timeout is retried. Returns the two new
+        balances, followed by the two ledger rows with receipt=True.
+        """
+        if int(from_acc_id) == int(to_acc_id):
+            raise ValueError("Cannot transfer to the same account")
+        amount = round(float(amount), 2)
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT id, balance, account_type, status FROM accounts WHERE id IN (%s,%s) "
+                        "ORDER BY id FOR UPDATE", (from_acc_id, to_acc_id))
+            rows = {r[0]: r[1:] for r in cur.fetchall()}
+            from_bal = rows.get(int(from_acc_id))
+            if not from_bal:
+                raise ValueError("Source account not found")
+            to_bal = rows.get(int(to_acc_id))
+            if not to_bal:
+                raise ValueError("Destination account not found")
+            
+            from_balance = float(from_bal[0])
+            to_balance = float(to_bal[0])
+            
+            if from_balance < amount:
+                raise ValueError("Insufficient funds in source account")
+            
+
+            new_from = round(from_balance - amount, 2)
+            new_to = round(to_balance + amount, 2)
+            
+            cur.executemany("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s",
+                            sorted([(new_from, from_acc_id), (new_to, to_acc_id)], key=lambda r: r[1]))
+            # bank_summary rows are upserted in (type, status, slot) order too
+            for acc_id, (_, acc_type, status), delta in sorted(((from_acc_id, from_bal, -amount),
+                                                                (to_acc_id, to_bal, amount)),
+                                                               key=lambda s: (s[1][1], s[1][2], int(s[0]) % SUMMARY_SLOTS)):
+                self._summary_add(cur, acc_id, acc_type, status, 0, delta)
+            
+
+            cur.execute(
+                "INSERT INTO transactions (account_id, amount, type, note, created_at) "
+                "VALUES (%s,%s,%s,%s,NOW()),(%s,%s,%s,%s,NOW())",
+                (from_acc_id, -amount, "transfer_out", note or f"Transfer to account {to_acc_id}",
+                 to_acc_id, amount, "transfer_in", note or f"Transfer from account {from_acc_id}")
+            )
+            # upsert the flow rows in key order, or opposite-type transfers could deadlock
+            for acc_id, kind, acc_type in sorted(((from_acc_id, "transfer_out", from_bal[1]),
+                                                  (to_acc_id, "transfer_in", to_bal[1])),
+                                                 key=lambda f: (f[2], int(f[0]) % SUMMARY_SLOTS)):
+                self._flows_add(cur, acc_id, kind, amount, account_type=acc_type)
+            rows = (self._latest_transaction(cur, from_acc_id), self._latest_transaction(cur, to_acc_id)) if receipt else ()
+            
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.info(f"Transfer: {amount:.2f} from account {from_acc_id} to {to_acc_id}")
+            return (new_from, new_to) + rows
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_retry_on_conflict
+    @_with_connection
+    def transfer_many(self, from_acc_id, transfers, atomic=True, dry_run=False):
+        """Transfer from one source account to many destinations in one transaction.
+
+        ``transfers`` is a sequence of ``(to_acc_id, amount, note)``. Every line
+        is validated up front (destination exists, positive amount, running
+        source balance). With ``atomic`` any failed line cancels the whole
+        batch; otherwise the valid lines are applied and the rest reported.
+        ``dry_run`` only validates.
+
+        Returns a dict with ``applied`` and ``failed`` lists of
+        ``(index, to_acc_id, amount[, error])``, ``committed``, and the
+        source ``balance`` after the batch (or as it would be).
+        """
+        from_acc_id = int(from_acc_id)
+        cur = self.conn.cursor()
+        try:
+            # lock source and destinations together in ascending id order, the
+            # same order transfer_funds uses, so concurrent transfers cannot deadlock
+            lock_ids = sorted({int(t[0]) for t in transfers} | {from_acc_id})
+            lock = "" if dry_run else " FOR UPDATE"
+            dests = {}
+            for i in range(0, len(lock_ids), BULK_CHUNK_SIZE):
+                chunk = lock_ids[i:i + BULK_CHUNK_SIZE]
+                cur.execute(f"SELECT id, account_type, status, balance FROM accounts "
+                            f"WHERE id IN ({','.join(['%s'] * len(chunk))}) ORDER BY id{lock}", tuple(chunk))
+                dests.update((row[0], row[1:]) for row in cur.fetchall())
+            src = dests.pop(from_acc_id, None)
+            if not src:
+                raise ValueError("Source account not found")
+            src = (src[2], src[0], src[1])
+
+            balance = float(src[0])
+            applied, failed = [], []
+            for index, (to_id, amount, note) in enumerate(transfers):
+                to_id, amount = int(to_id), float(amount)
+                if amount <= 0:
+                    error = "Amount must be positive"
+                elif to_id == from_acc_id:
+                    error = "Cannot transfer to the source account"
+                elif to_id not in dests:
+                    error = "Destination account not found"
+                elif amount > balance + 1e-9:
+                    error = "Insufficient funds in source account"
+                else:
+                    balance -= amount
+                    applied.append((index, to_id, amount, note))
+                    continue
+                failed.append((index, to_id, amount, error))
+
+            result = {'applied': [a[:3] for a in applied], 'failed': failed,
+                      'committed': False, 'balance': round(balance, 2)}
+            if atomic and failed:
+                result['applied'] = []
+                result['balance'] = round(float(src[0]), 2)
+            if dry_run or not applied or (atomic and failed):
+                self.conn.rollback()
+                return result
+
+            credits = {}
+            for _, to_id, amount, _ in applied:
+                credits[to_id] = credits.get(to_id, 0.0) + amount
+            total = sum(credits.values())
+
+            cur.execute("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s",
+                        (round(balance, 2), from_acc_id))
+            cur.executemany("UPDATE accounts SET balance=balance+%s, last_transaction_date=NOW() WHERE id=%s",
+                            [(round(amt, 2), to_id) for to_id, amt in sorted(credits.items())])
+
+            deltas = {}
+            for to_id, amt in credits.items():
+                key = (dests[to_id][0], dests[to_id][1], to_id % SUMMARY_SLOTS)
+                deltas[key] = deltas.get(key, 0.0) + amt
+            key = (src[1], src[2], from_acc_id % SUMMARY_SLOTS)
+            deltas[key] = deltas.get(key, 0.0) - total
+            cur.executemany(self.backend.upsert_add_sql("bank_summary", ("account_type", "status", "slot"),
+                                                        ("accounts", "balance")),
+                            [(t, st, slot, 0, round(amt, 2)) for (t, st, slot), amt in sorted(deltas.items())])
+
+            ledger = []
+            for _, to_id, amount, note in applied:
+                ledger.append((from_acc_id, -amount, "transfer_out", note or f"Transfer to account {to_id}"))
+                ledger.append((to_id, amount, "transfer_in", note or f"Transfer from account {from_acc_id}"))
+            # no ledger rows, no balance moves: a failure here rolls the batch back
+            for i in range(0, len(ledger), BULK_CHUNK_SIZE):
+                chunk = ledger[i:i + BULK_CHUNK_SIZE]
+                cur.execute("INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES "
+                            + ",".join(["(%s,%s,%s,%s,NOW())"] * len(chunk)),
+                            tuple(v for row in chunk for v in row))
+            flows = {}
+            for _, to_id, amount, _ in applied:
+                for acc_id, acc_type, kind in ((from_acc_id, src[1], "transfer_out"),
+                                               (to_id, dests[to_id][0], "transfer_in")):
+                    key = (acc_type, acc_id % SUMMARY_SLOTS, kind)
+                    flows.setdefault(key, [0.0, 0])
+                    flows[key][0] += amount
+                    flows[key][1] += 1
+            cur.executemany(self._flows_sql(),
+                            [self._flows_row(t, slot, kind, amt, n) for (t, slot, kind), (amt, n) in sorted(flows.items())])
+
+            self.conn.commit()
+            self._invalidate_stats()
+            result['committed'] = True
+            logging.info(f"Bulk transfer: {total:.2f} from account {from_acc_id} in {len(applied)} transfers, "
+                         f"{len(failed)} rejected")
+            return result
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+    
+
+    @_with_connection
+    def create_loan(self, account_id, amount, term_months, rate):
+        """Create a loan request (status Pending). Returns loan_id."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO loans (account_id, amount, term_months, rate, status) VALUES (%s,%s,%s,%s,%s)",
+                (account_id, float(amount), int(term_months), float(rate), "Pending")
+            )
+            loan_id = cur.lastrowid
+            self.conn.commit()
+            logging.info(f"Loan request created: loan_id={loan_id} account_id={account_id} amount={amount}")
+            return loan_id
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_with_connection
+    def get_loans(self, account_id = None, status = None, limit=1000):
+        cur = self.conn.cursor()
+        try:
+            sql = "SELECT * FROM loans"
+            where = []
+            params = []
+            if account_id:
+                where.append("account_id=%s"); params.append(account_id)
+            if status:
+                where.append("status=%s"); params.append(status)
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY created_at DESC LIMIT %s"; params.append(limit)
+            cur.execute(sql, tuple(params))
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    @_with_connection
+    def update_loan_status(self, loan_id, new_status, admin_note=None):
+        cur = self.conn.cursor()
+        try:
+
+            cur.execute("SELECT account_id, amount, status FROM loans WHERE id=%s FOR UPDATE", (loan_id,))
+            row = cur.fetchone()
+            if not row:
+                raise ValueError("Loan not found")
+            account_id, amount, cur_status = row
+            if cur_status == new_status:
+                return
+
+            if new_status == "Approved":
+                # disbursement commits (or rolls back) together with the status change
+                self.change_balance(account_id, float(amount), trans_type="loan_disbursement",
+                                    note=f"Loan #{loan_id} disbursed", commit=False)
+ 
+            cur.execute("UPDATE loans SET status=%s, updated_at=NOW() WHERE id=%s", (new_status, loan_id))
+           
+            cur.execute("INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
+                        (account_id, amount if new_status == "Approved" else 0.0, f"loan_{new_status.lower()}", admin_note))
+            self._flows_add(cur, account_id, f"loan_{new_status.lower()}", 0)
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.info(f"Loan {loan_id} status changed to {new_status} by admin")
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+    @_with_connection
+    def add_debt(self, account_id, amount, description=None):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("INSERT INTO debts (account_id, amount, description, status) VALUES (%s,%s,%s,%s)",
+                        (account_id, float(amount), description, "Open"))
+            debt_id = cur.lastrowid
+            self.conn.commit()
+            logging.info(f"Debt recorded: debt_id={debt_id} account_id={account_id} amount={amount}")
+            return debt_id
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @_with_connection
+    def get_debts(self, account_id=None, status=None,limit = 1000):
+        cur = self.conn.cursor()
+        try:
+            sql = "SELECT id, account_id, amount, description, status, created_at FROM debts"
+            where = []
+            params = []
+            if account_id:
+                where.append("account_id=%s"); params.append(account_id)
+            if status:
+                where.append("status=%s"); params.append(status)
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY created_at DESC LIMIT %s"; params.append(limit)
+            cur.execute(sql, tuple(params))
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def _keyset_page(self, select, where, params, cursor, limit):
+        """Run one page of ``select`` newest-first on the (created_at, id) key.
+
+        ``select`` must return created_at and id as its last and first
+        columns. With a cursor the page starts right after that row using
+        an index range seek, otherwise at the newest row. Returns
+        (rows, next_cursor), next_cursor being None on the last page.
+        """
+        where = list(where)
+        params = list(params)
+        if cursor:
+            ts, row_id = _decode_cursor(cursor)
+            # the leading created_at bound lets the (..., created_at, id) index seek;
+            # the OR alone would only filter a walk from the top
+            where.append("created_at <= %s AND (created_at < %s OR id < %s)")
+            params.extend([ts, ts, row_id])
+        sql = select
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+        params.append(int(limit) + 1)
+
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, tuple(params))
+            rows = cur.fetchmany(int(limit) + 1)
+        finally:
+            cur.close()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            return rows, _encode_cursor(last[-1], last[0])
+        return rows, None
+
+    def _keyset_seek(self, table, where, params, cursor, rows, reverse=False):
+        """Cursor of the row ``rows`` places after ``cursor`` in newest-first order.
+
+        Walks only the (created_at, id) key, from the newest row when there
+        is no cursor. ``reverse`` counts back towards the newest row instead,
+        from the oldest one without a cursor. Jumps use this to reach a page
+        from the nearest known position rather than with an OFFSET from the
+        top. Returns None when fewer rows are left.
+        """
+        where = list(where)
+        params = list(params)
+        if cursor:
+            ts, row_id = _decode_cursor(cursor)
+            if reverse:
+                where.append("created_at >= %s AND (created_at > %s OR id > %s)")
+            else:
+                where.append("created_at <= %s AND (created_at < %s OR id < %s)")
+            params.extend([ts, ts, row_id])
+        order, last = ("ASC", "MAX") if reverse else ("DESC", "MIN")
+        walk = f"SELECT id, created_at FROM {table}"
+        if where:
+            walk += " WHERE " + " AND ".join(where)
+        walk += f" ORDER BY created_at {order}, id {order} LIMIT %s"
+        params.append(int(rows))
+
+        # aggregate over the walk so only its last key leaves the database
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"SELECT COUNT(*), {last}(created_at) FROM ({walk}) AS w", tuple(params))
+            seen, ts = cur.fetchone()
+            if not seen or seen < rows:
+                return None
+            cur.execute(f"SELECT {last}(id) FROM ({walk}) AS w WHERE created_at=%s", tuple(params) + (ts,))
+            row_id = cur.fetchone()[0]
+        finally:
+            cur.close()
+        return _encode_cursor(ts, row_id)
+
+    @_with_connection
+    def get_accounts_page(self, filters=None, cursor=None, limit=100):
+        where, params = self._account_filters(filters)
+        return self._keyset_page(
+            "SELECT id, account_number, name, emirates_id, balance, account_type, status, created_at FROM accounts",
+            where, params, cursor, limit)
+
+    @_with_connection
+    def seek_accounts(self, filters=None, cursor=None, rows=0, reverse=False):
+        """Cursor ``rows`` accounts on from ``cursor``, for jumping through get_accounts_page()."""
+        where, params = self._account_filters(filters)
+        return self._keyset_seek("accounts", where, params, cursor, rows, reverse)
+
+    @_with_connection
+    def get_transactions_page(self, acc_id=None, date_from=None, date_to=None, cursor=None, limit=100):
+        """One keyset page of the ledger; pages run on into the archive after the live rows."""
+        where, params = self._transaction_where(acc_id, date_from, date_to)
+        select = "SELECT " + ", ".join(self.TRANSACTION_COLUMNS) + " FROM "
+        rows, next_cursor = self._keyset_page(select + "transactions", where, params, cursor, limit)
+        if next_cursor is None and "transactions_archive" in self._transaction_tables(date_from):
+            if len(rows) == limit:
+                # the archive may continue where the live table ended
+                next_cursor = _encode_cursor(rows[-1][-1], rows[-1][0])
+            else:
+                after = _encode_cursor(rows[-1][-1], rows[-1][0]) if rows else cursor
+                more, next_cursor = self._keyset_page(select + "transactions_archive", where, params,
+                                                      after, limit - len(rows))
+                rows = list(rows) + list(more)
+        return rows, next_cursor
+
+    @_with_connection
+    def get_loans_page(self, account_id=None, status=None, cursor=None, limit=100):
+        where, params = [], []
+        if account_id:
+            where.append("account_id=%s"); params.append(account_id)
+        if status:
+            where.append("status=%s"); params.append(status)
+        return self._keyset_page(
+            "SELECT id, account_id, amount, term_months, rate, status, created_at FROM loans",
+            where, params, cursor, limit)
+
+    @_with_connection
+    def get_debts_page(self, account_id=None, status=None, cursor=None, limit=100):
+        where, params = [], []
+        if account_id:
+            where.append("account_id=%s"); params.append(account_id)
+        if status:
+            where.append("status=%s"); params.append(status)
+        return self._keyset_page(
+            "SELECT id, account_id, amount, description, status, created_at FROM debts",
+            where, params, cursor, limit)
+
+    @_with_connection
+    def settle_debt(self, debt_id):
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT account_id, amount, status FROM debts WHERE id=%s FOR UPDATE", (debt_id,))
+            row = cur.fetchone()
+            if not row:
+                raise ValueError("Debt not found")
+            account_id, amount, status = row
+            if status == "Settled":
+                raise ValueError("Debt already settled")
+            
+        
+            cur.execute("SELECT balance, account_type, status FROM accounts WHERE id=%s FOR UPDATE", (account_id,))
+            acc_row = cur.fetchone()
+            if not acc_row:
+                raise ValueError("Account not found")
+            
+            current_balance = float(acc_row[0])
+            debt_amount = float(amount)
+            
+            if current_balance < debt_amount:
+                raise ValueError(f"Insufficient funds. Balance: ${current_balance:.2f}, Debt: ${debt_amount:.2f}")
+            
+          
+            new_balance = current_balance - debt_amount
+            cur.execute("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s", 
+                    (round(new_balance, 2), account_id))
+            self._summary_add(cur, account_id, acc_row[1], acc_row[2], 0, -debt_amount)
+            
+            
+            cur.execute("UPDATE debts SET status='Settled' WHERE id=%s", (debt_id,))
+            
+           
+            cur.execute(
+                "INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
+                (account_id, -debt_amount, "debt_payment", f"Debt #{debt_id} settled")
+            )
+            self._flows_add(cur, account_id, "debt_payment", debt_amount, account_type=acc_row[1])
+            
+            self.conn.commit()
+            self._invalidate_stats()
+            logging.info(f"Debt {debt_id} settled for account {account_id}, amount: ${debt_amount:.2f}")
+            return new_balance
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def format_report(stats, generated=None):
+    """Plain-text bank report built from BankDB.get_statistics()."""
+    generated = generated or datetime.now()
+    report = f"""
+{'='*60}
+        BANK MANAGEMENT SYSTEM - COMPREHENSIVE REPORT
+{'='*60}
+Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}
+
+ACCOUNT OVERVIEW
+{'-'*60}
+Total Active Accounts:        {stats.get('total_accounts', 0):>10,}
+Frozen Accounts:              {stats.get('frozen_accounts', 0):>10,}
+New Accounts (Last 30 Days):  {stats.get('new_accounts_30d', 0):>10,}
+
+FINANCIAL SUMMARY
+{'-'*60}
+Total Balance:                ${stats.get('total_balance', 0):>10,.2f}
+Average Balance:              ${stats.get('avg_balance', 0):>10,.2f}
+
+ACCOUNT TYPE BREAKDOWN
+{'-'*60}
+"""
+    for acc_type, count in stats.get('by_type', {}).items():
+        report += f"{acc_type:<30} {count:>10,}\n"
+    report += f"\n{'='*60}\n"
+    return report
+
+
+class BackgroundExecutor:
+    """Runs BankDB calls on worker threads and hands the results back to Tk.
+
+    Jobs are submitted under a key ("accounts", "dashboard", ...). A newer
+    job under the same key supersedes the older one: if it has not started
+    it is cancelled, otherwise its result is dropped. Callbacks always run
+    on the Tk thread, from a queue drained with ``after()``.
+    """
+
+    def __init__(self, root, workers=4, poll_ms=25):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bankdb-worker")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = {}
+        self._futures = {}
+        self._closed = False
+        self.root.after(self.poll_ms, self._drain)
+
+    def submit(self, key, fn, *args, on_done=None, on_error=None, **kwargs):
+        with self._lock:
+            gen = self._generation.get(key, 0) + 1
+            self._generation[key] = gen
+            old = self._futures.pop(key, None)
+            if old is not None:
+                old.cancel()
+            self._futures[key] = self._pool.submit(self._run, key, gen, fn, args, kwargs, on_done, on_error)
+        return gen
+
+    def cancel(self, key):
+        """Drop whatever is pending under ``key``."""
+        with self._lock:
+            self._generation[key] = self._generation.get(key, 0) + 1
+            old = self._futures.pop(key, None)
+        if old is not None:
+            old.cancel()
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._futures
+
+    def post(self, fn, *args):
+        """Run ``fn(*args)`` on the Tk thread; safe to call from a worker (e.g. progress)."""
+        self._results.put((None, None, True, args, fn, None))
+
+    def _is_current(self, key, gen):
+        with self._lock:
+            return self._generation.get(key) == gen
+
+    def _run(self, key, gen, fn, args, kwargs, on_done, on_error):
+        if not self._is_current(key, gen):
+            return
+        try:
+            result, ok = fn(*args, **kwargs), True
+        except Exception as e:
+            result, ok = e, False
+        self._results.put((key, gen, ok, result, on_done, on_error))
+
+    def _drain(self):
+        while True:
+            try:
+                key, gen, ok, result, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if key is None:
+                try:
+                    on_done(*result)
+                except Exception:
+                    logging.exception("Posted callback failed")
+                continue
+            with self._lock:
+                if self._generation.get(key) != gen:
+                    continue
+                self._futures.pop(key, None)
+            callback = on_done if ok else on_error
+            if callback is None:
+                if not ok:
+                    logging.error(f"Background job '{key}' failed: {result}")
+                continue
+            try:
+                callback(result)
+            except Exception:
+                logging.exception(f"Callback for background job '{key}' failed")
+        if not self._closed:
+            self.root.after(self.poll_ms, self._drain)
+
+    def shutdown(self):
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,31 +1,23 @@
-import requests
 import os
 import csv
-import re
-import hashlib
+import base64
+import io
 import logging
-from datetime import datetime, timedelta
-from decimal import Decimal
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog, scrolledtext
-import mysql.connector
-from mysql.connector import Error, IntegrityError
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from bankcore import (BankDB, BackgroundExecutor, IntegrityError, ARCHIVE_AFTER_DAYS, DB_POOL_SIZE, EXPORT_WORKERS,
+                      LOG_FILE, format_report, load_admin_password_hash, save_admin_password_hash, sha256_hash,
+                      validate_email, validate_phone)
 
+# Matplotlib (analytics) and requests (AI assistant) are imported when first
+# used, so neither slows down start-up.
 
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASS = "hello"  
-DB_NAME = "bankdb"
-DB_PORT = 3306
-
-ADMIN_PASSWORD_FILE = "admin.pass"
-LOG_FILE = "bank_operations.log"
-
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO,
-                    format="%(asctime)s [%(levelname)s] %(message)s")
+ANALYTICS_CACHE_DIR = "analytics_cache"
+UI_WORKERS = 4            # BackgroundExecutor threads; the pool gets one more connection for the Tk thread
 
 
 COLORS = {
@@ -43,33 +35,6 @@ COLORS = {
 }
 
 
-def load_admin_password_hash():
-    if os.path.exists(ADMIN_PASSWORD_FILE):
-        try:
-            with open(ADMIN_PASSWORD_FILE, "r") as f:
-                return f.read().strip()
-        except Exception:
-            pass
-    return hashlib.sha256("admin123".encode()).hexdigest()
-
-def save_admin_password_hash(h):
-    with open(ADMIN_PASSWORD_FILE, "w") as f:
-        f.write(h)
-
-def sha256_hash(s: str):
-    return hashlib.sha256(s.encode()).hexdigest()
-
-def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_phone(phone):
-    pattern = r'^\+?[0-9]{10,15}$'
-    return re.match(pattern, phone) is not None
-
-
-
-
 GEMINI_API_KEY = "your_gemeni_api_key"
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
@@ -126,6 +91,7 @@ IMPORTANT RESTRICTIONS:
         api_key = os.environ.get("GEMINI_API_KEY") or GEMINI_API_KEY
         url = f"{GEMINI_API_URL}?key={api_key}"
 
+        import requests
         try:
             resp = requests.post(url, json=payload, headers=headers, timeout=15)
             resp.raise_for_status()
@@ -196,497 +162,6 @@ IMPORTANT RESTRICTIONS:
             return f"Error parsing AI response: {e}"
 
 
-class BankDB:
-    def __init__(self, host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, port=DB_PORT):
-        try:
-            self.conn = mysql.connector.connect(
-                host=host, user=user, password=password, database=database, port=port
-            )
-            self.conn.autocommit = False
-        except mysql.connector.Error as e:
-            raise RuntimeError(f"Database connection failed: {e}")
-
-    def close(self):
-        try:
-            if self.conn.is_connected():
-                self.conn.close()
-        except Exception:
-            pass
-
-    def _get_next_auto_increment(self, table="accounts"):
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                "SELECT AUTO_INCREMENT FROM information_schema.TABLES "
-                "WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s",
-                (self.conn.database, table)
-            )
-            r = cur.fetchone()
-            return int(r[0]) if r and r[0] else None
-        finally:
-            cur.close()
-
-    def add_account(self, name, account_number, emirates_id, balance,
-                    phone, email, account_type):
-        if not re.match(r'^\d{3}-\d{4}-\d{7}-\d{1}$', emirates_id):
-            raise ValueError("Invalid Emirates ID format (XXX-XXXX-XXXXXXX-X)")
-
-        acct_no = account_number.strip() if account_number and account_number.strip() else None
-        if not acct_no:
-            next_ai = self._get_next_auto_increment("accounts")
-            if next_ai:
-                acct_no = f"AC{next_ai:08d}"
-            else:
-                acct_no = f"AC{int(datetime.utcnow().timestamp()):010d}"
-
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                """INSERT INTO accounts 
-                   (name, account_number, emirates_id, balance, phone, email, account_type, status, created_at)
-                   VALUES (%s,%s,%s,%s,%s,%s,%s,%s,NOW())""",
-                (name, acct_no, emirates_id, float(balance), phone or None, email or None, account_type, "Active")
-            )
-            last_id = cur.lastrowid
-            self.conn.commit()
-            logging.info(f"Account created: {acct_no} (id={last_id}) by admin")
-            return last_id, acct_no
-        except IntegrityError as ie:
-            self.conn.rollback()
-            raise
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def update_account(self, acc_id, name, account_number, emirates_id, phone, email, account_type, status):
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                """UPDATE accounts SET name=%s, account_number=%s, emirates_id=%s,
-                   phone=%s, email=%s, account_type=%s, status=%s, last_transaction_date=last_transaction_date
-                   WHERE id=%s""",
-                (name, account_number, emirates_id, phone or None, email or None, account_type, status, acc_id)
-            )
-            self.conn.commit()
-            logging.info(f"Account updated: id={acc_id} by admin")
-        except IntegrityError:
-            self.conn.rollback()
-            raise
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def delete_account(self, acc_id):
-        cur = self.conn.cursor()
-        try:
-            cur.execute("DELETE FROM accounts WHERE id=%s", (acc_id,))
-            self.conn.commit()
-            logging.warning(f"Account deleted: id={acc_id} by admin")
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def get_accounts(self, filters=None):
-        sql = ("SELECT id, account_number, name, emirates_id, balance, account_type, status, created_at "
-               "FROM accounts")
-        params = []
-        where = []
-
-        if filters:
-            search = filters.get("search")
-            search_col = filters.get("search_col")
-            if search:
-                if search_col in ("name", "account_number", "emirates_id"):
-                    where.append(f"{search_col} LIKE %s")
-                    params.append(f"%{search}%")
-                else:
-                    where.append("(name LIKE %s OR account_number LIKE %s OR emirates_id LIKE %s)")
-                    params.extend([f"%{search}%"] * 3)
-
-            if filters.get("status"):
-                where.append("status=%s"); params.append(filters["status"])
-            if filters.get("account_type"):
-                where.append("account_type=%s"); params.append(filters["account_type"])
-            if filters.get("date_from"):
-                where.append("created_at >= %s"); params.append(filters["date_from"])
-            if filters.get("date_to"):
-                where.append("created_at <= %s"); params.append(filters["date_to"])
-            if filters.get("balance_min"):
-                where.append("balance >= %s"); params.append(filters["balance_min"])
-            if filters.get("balance_max"):
-                where.append("balance <= %s"); params.append(filters["balance_max"])
-
-        if where:
-            sql += " WHERE " + " AND ".join(where)
-
-        sql += " ORDER BY created_at DESC LIMIT 1000"
-
-        cur = self.conn.cursor()
-        try:
-            cur.execute(sql, tuple(params))
-            rows = cur.fetchall()
-            return rows
-        finally:
-            cur.close()
-
-    def get_account(self, acc_id):
-        cur = self.conn.cursor()
-        try:
-            cur.execute("SELECT id, account_number, name, emirates_id, balance, phone, email, account_type, status, created_at FROM accounts WHERE id=%s", (acc_id,))
-            return cur.fetchone()
-        finally:
-            cur.close()
-
-    def change_balance(self, acc_id, amount, trans_type="manual", note=None):
-        cur = self.conn.cursor()
-        try:
-            cur.execute("SELECT balance FROM accounts WHERE id=%s FOR UPDATE", (acc_id,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Account not found")
-            bal = float(row[0])
-            new_bal = bal + float(amount)
-            if new_bal < 0:
-                raise ValueError("Insufficient funds")
-            cur.execute("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s", (round(new_bal, 2), acc_id))
-            try:
-                cur.execute(
-                    "INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
-                    (acc_id, amount, trans_type, note)
-                )
-            except Exception:
-                pass
-            self.conn.commit()
-            logging.info(f"Balance changed for account id={acc_id}: {amount:+.2f} new={new_bal:.2f}")
-            return new_bal
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def get_transactions(self, acc_id=None, limit=200, date_from=None, date_to=None):
-        cur = self.conn.cursor()
-        try:
-            sql = "SELECT id, account_id, amount, type, note, created_at FROM transactions"
-            params = []
-            where = []
-            if acc_id:
-                where.append("account_id=%s"); params.append(acc_id)
-            if date_from:
-                where.append("created_at >= %s"); params.append(date_from)
-            if date_to:
-                where.append("created_at <= %s"); params.append(date_to)
-            if where:
-                sql += " WHERE " + " AND ".join(where)
-            sql += " ORDER BY created_at DESC LIMIT %s"; params.append(limit)
-            cur.execute(sql, tuple(params))
-            return cur.fetchall()
-        except Exception:
-            return []
-        finally:
-            cur.close()
-
-    def get_statistics(self):
-        cur = self.conn.cursor()
-        try:
-            stats = {}
-            cur.execute("SELECT COUNT(*), SUM(balance), AVG(balance) FROM accounts WHERE status='Active'")
-            row = cur.fetchone()
-            stats['total_accounts'] = row[0] or 0
-            stats['total_balance'] = float(row[1] or 0)
-            stats['avg_balance'] = float(row[2] or 0)
-            
-            cur.execute("SELECT COUNT(*) FROM accounts WHERE status='Frozen'")
-            stats['frozen_accounts'] = cur.fetchone()[0] or 0
-            
-            cur.execute("SELECT COUNT(*) FROM accounts WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)")
-            stats['new_accounts_30d'] = cur.fetchone()[0] or 0
-            
-            cur.execute("SELECT account_type, COUNT(*) FROM accounts GROUP BY account_type")
-            stats['by_type'] = dict(cur.fetchall())
-            
-            return stats
-        except Exception as e:
-            return {}
-        finally:
-            cur.close()
-
-    def export_accounts_csv(self, filename, filters=None):
-        rows = self.get_accounts(filters=filters)
-        headers = ["id", "account_number", "name", "emirates_id", "balance", "account_type", "status", "created_at"]
-        with open(filename, "w", newline='', encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(headers)
-            for r in rows:
-                r = list(r)
-                try:
-                    r[4] = f"{float(r[4]):.2f}"
-                except Exception:
-                    pass
-                w.writerow(r)
-        logging.info(f"Accounts exported to CSV: {filename}")
-
-    def export_transactions_csv(self, filename, acc_id=None, date_from=None, date_to=None):
-        rows = self.get_transactions(acc_id=acc_id, date_from=date_from, date_to=date_to, limit=10000)
-        headers = ["id", "account_id", "amount", "type", "note", "created_at"]
-        with open(filename, "w", newline='', encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(headers)
-            for r in rows:
-                w.writerow(r)
-        logging.info(f"Transactions exported to CSV: {filename}")
-
-    def transfer_funds(self, from_acc_id, to_acc_id, amount, note=None):
-        """Transfer funds between accounts"""
-        cur = self.conn.cursor()
-        try:
-    
-            cur.execute("SELECT balance FROM accounts WHERE id=%s FOR UPDATE", (from_acc_id,))
-            from_bal = cur.fetchone()
-            if not from_bal:
-                raise ValueError("Source account not found")
-            
-            cur.execute("SELECT balance FROM accounts WHERE id=%s FOR UPDATE", (to_acc_id,))
-            to_bal = cur.fetchone()
-            if not to_bal:
-                raise ValueError("Destination account not found")
-            
-            from_balance = float(from_bal[0])
-            to_balance = float(to_bal[0])
-            
-            if from_balance < amount:
-                raise ValueError("Insufficient funds in source account")
-            
-
-            new_from = from_balance - amount
-            new_to = to_balance + amount
-            
-            cur.execute("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s", 
-                       (round(new_from, 2), from_acc_id))
-            cur.execute("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s", 
-                       (round(new_to, 2), to_acc_id))
-            
-
-            try:
-                cur.execute(
-                    "INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
-                    (from_acc_id, -amount, "transfer_out", note or f"Transfer to account {to_acc_id}")
-                )
-                cur.execute(
-                    "INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
-                    (to_acc_id, amount, "transfer_in", note or f"Transfer from account {from_acc_id}")
-                )
-            except Exception:
-                pass
-            
-            self.conn.commit()
-            logging.info(f"Transfer: {amount:.2f} from account {from_acc_id} to {to_acc_id}")
-            return new_from, new_to
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-    
-
-    def close(self):
-        try:
-            if self.conn.is_connected():
-                self.conn.close()
-        except Exception:
-            pass
-
-    def create_loan(self, account_id, amount, term_months, rate):
-        """Create a loan request (status Pending). Returns loan_id."""
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                "INSERT INTO loans (account_id, amount, term_months, rate, status) VALUES (%s,%s,%s,%s,%s)",
-                (account_id, float(amount), int(term_months), float(rate), "Pending")
-            )
-            loan_id = cur.lastrowid
-            self.conn.commit()
-            logging.info(f"Loan request created: loan_id={loan_id} account_id={account_id} amount={amount}")
-            return loan_id
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def get_loans(self, account_id = None, status = None, limit=1000):
-        cur = self.conn.cursor()
-        try:
-            sql = "SELECT * FROM loans"
-            where = []
-            params = []
-            if account_id:
-                where.append("account_id=%s"); params.append(account_id)
-            if status:
-                where.append("status=%s"); params.append(status)
-            if where:
-                sql += " WHERE " + " AND ".join(where)
-            sql += " ORDER BY created_at DESC LIMIT %s"; params.append(limit)
-            cur.execute(sql, tuple(params))
-            return cur.fetchall()
-        finally:
-            cur.close()
-
-    def update_loan_status(self, loan_id, new_status, admin_note=None):
-        cur = self.conn.cursor()
-        try:
-
-            cur.execute("SELECT account_id, amount, status FROM loans WHERE id=%s FOR UPDATE", (loan_id,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Loan not found")
-            account_id, amount, cur_status = row
-            if cur_status == new_status:
-                return
-
-            if new_status == "Approved":
-       
-                self.change_balance(account_id, float(amount), trans_type="loan_disbursement", note=f"Loan #{loan_id} disbursed")
- 
-            cur.execute("UPDATE loans SET status=%s, updated_at=NOW() WHERE id=%s", (new_status, loan_id))
-           
-            try:
-                cur.execute("INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
-                            (account_id, amount if new_status == "Approved" else 0.0, f"loan_{new_status.lower()}", admin_note))
-            except Exception:
-                pass
-            self.conn.commit()
-            logging.info(f"Loan {loan_id} status changed to {new_status} by admin")
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-
-    def add_debt(self, account_id, amount, description=None):
-        cur = self.conn.cursor()
-        try:
-            cur.execute("INSERT INTO debts (account_id, amount, description, status) VALUES (%s,%s,%s,%s)",
-                        (account_id, float(amount), description, "Open"))
-            debt_id = cur.lastrowid
-            self.conn.commit()
-            logging.info(f"Debt recorded: debt_id={debt_id} account_id={account_id} amount={amount}")
-            return debt_id
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def get_debts(self, account_id=None, status=None,limit = 1000):
-        cur = self.conn.cursor()
-        try:
-            sql = "SELECT id, account_id, amount, description, status, created_at FROM debts"
-            where = []
-            params = []
-            if account_id:
-                where.append("account_id=%s"); params.append(account_id)
-            if status:
-                where.append("status=%s"); params.append(status)
-            if where:
-                sql += " WHERE " + " AND ".join(where)
-            sql += " ORDER BY created_at DESC"
-            cur.execute(sql, tuple(params))
-            return cur.fetchall()
-        finally:
-            cur.close()
-
-    def settle_debt(self, debt_id):
-        cur = self.conn.cursor()
-        try:
-            cur.execute("SELECT account_id, amount, status FROM debts WHERE id=%s FOR UPDATE", (debt_id,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Debt not found")
-            account_id, amount, status = row
-            if status == "Settled":
-                raise ValueError("Debt already settled")
-            
-        
-            cur.execute("SELECT balance FROM accounts WHERE id=%s FOR UPDATE", (account_id,))
-            acc_row = cur.fetchone()
-            if not acc_row:
-                raise ValueError("Account not found")
-            
-            current_balance = float(acc_row[0])
-            debt_amount = float(amount)
-            
-            if current_balance < debt_amount:
-                raise ValueError(f"Insufficient funds. Balance: ${current_balance:.2f}, Debt: ${debt_amount:.2f}")
-            
-          
-            new_balance = current_balance - debt_amount
-            cur.execute("UPDATE accounts SET balance=%s, last_transaction_date=NOW() WHERE id=%s", 
-                    (round(new_balance, 2), account_id))
-            
-            
-            cur.execute("UPDATE debts SET status='Settled' WHERE id=%s", (debt_id,))
-            
-           
-            try:
-                cur.execute(
-                    "INSERT INTO transactions (account_id, amount, type, note, created_at) VALUES (%s,%s,%s,%s,NOW())",
-                    (account_id, -debt_amount, "debt_payment", f"Debt #{debt_id} settled")
-                )
-            except Exception:
-                pass
-            
-            self.conn.commit()
-            logging.info(f"Debt {debt_id} settled for account {account_id}, amount: ${debt_amount:.2f}")
-            return new_balance
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def close(self):
-        try:
-            if self.conn.is_connected():
-                self.conn.close()
-        except Exception:
-            pass
-
-    def get_statistics(self):
-        """Return the same bank statistics as used by the UI (safe to call)."""
-        cur = self.conn.cursor()
-        try:
-            stats = {}
-            cur.execute("SELECT COUNT(*), SUM(balance), AVG(balance) FROM accounts WHERE status='Active'")
-            row = cur.fetchone()
-            stats['total_accounts'] = row[0] or 0
-            stats['total_balance'] = float(row[1] or 0)
-            stats['avg_balance'] = float(row[2] or 0)
-
-            cur.execute("SELECT COUNT(*) FROM accounts WHERE status='Frozen'")
-            stats['frozen_accounts'] = cur.fetchone()[0] or 0
-
-            cur.execute("SELECT COUNT(*) FROM accounts WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)")
-            stats['new_accounts_30d'] = cur.fetchone()[0] or 0
-
-            cur.execute("SELECT account_type, COUNT(*) FROM accounts GROUP BY account_type")
-            stats['by_type'] = dict(cur.fetchall())
-
-            return stats
-        finally:
-            cur.close()
-
-
-
-
 class ModernButton(tk.Button):
     def __init__(self, parent, text="", command=None, style="primary", **kwargs):
         color = COLORS.get(style, COLORS['primary'])
@@ -719,6 +194,207 @@ class StyledEntry(ttk.Entry):
         super().__init__(parent, style='Styled.TEntry', **kwargs)
     
 
+class VirtualTreeview:
+    """A Treeview that shows a sliding window over a large paged result set.
+
+    Only the rows that fit on screen are inserted into the widget. Pages
+    are fetched on demand through the BackgroundExecutor and kept in a
+    small LRU cache, so memory use and redraw time stay the same whether
+    the query matches a hundred rows or millions.
+
+    ``fetch_page(query, limit, cursor)`` returns ``(rows, next_cursor)`` for
+    the page after ``cursor``; ``seek(query, cursor, rows, reverse)`` returns
+    the cursor ``rows`` rows on from ``cursor`` (back from it with
+    ``reverse``, where no cursor means the end), so jumps never page with
+    an OFFSET.
+    """
+
+    def __init__(self, parent, executor, columns, fetch_page, seek, count_rows,
+                 format_row=None, page_size=200, max_pages=16, key="grid"):
+        self.executor = executor
+        self.fetch_page = fetch_page
+        self.seek = seek
+        self.count_rows = count_rows
+        self.format_row = format_row or list
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.key = key
+
+        self.total = 0
+        self.top = 0
+        self.visible = 20
+        self.query = None
+        self.selected_iid = None
+        self._pages = OrderedDict()
+        self._cursors = {}
+        self._loading = set()
+        self._on_loaded = None
+
+        self.frame = ttk.Frame(parent)
+        self.vsb = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.hsb = ttk.Scrollbar(self.frame, orient="horizontal")
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings",
+                                 selectmode="browse", xscrollcommand=self.hsb.set)
+        self.hsb.config(command=self.tree.xview)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.vsb.grid(row=0, column=1, sticky='ns')
+        self.hsb.grid(row=1, column=0, sticky='ew')
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(self.total))
+        self.tree.bind("<<TreeviewSelect>>", self._remember_selection, add="+")
+
+    def load(self, query, on_loaded=None):
+        """Show the rows matching ``query`` (passed through to the fetchers), from the top."""
+        self.query = query
+        self.top = 0
+        self._on_loaded = on_loaded
+        self._pages.clear()
+        self._cursors.clear()
+        self._loading.clear()
+        self.executor.cancel(self.key + ":page")
+
+        def first():
+            return self.count_rows(query), self.fetch_page(query, self.page_size, None)
+
+        self.executor.submit(self.key, first, on_done=lambda res: self._loaded(query, *res),
+                             on_error=lambda e: messagebox.showerror("DB Error", str(e)))
+
+    def _loaded(self, query, total, first_page):
+        if query is not self.query:
+            return
+        self.total = total
+        self._cursors[0] = None
+        rows, self._cursors[1] = first_page
+        self._pages[0] = list(rows)
+        self._render()
+        if self._on_loaded:
+            self._on_loaded(total)
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), max(0, self.total - self.visible)))
+        if top != self.top:
+            self.top = top
+            self._render()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 25)
+        visible = max(1, (event.height - rowheight) // rowheight)
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(self.top)
+            self._render()
+
+    def _remember_selection(self, event):
+        sel = self.tree.selection()
+        if sel:
+            self.selected_iid = sel[0]
+
+    def _render(self):
+        first_page = self.top // self.page_size
+        last_page = min(self.top + self.visible, max(self.total, 1)) // self.page_size
+        missing = [p for p in range(first_page, last_page + 1)
+                   if p not in self._pages and p * self.page_size < self.total]
+        self._set_scrollbar()
+        if missing:
+            self._fetch(missing)
+            return
+
+        rows = []
+        for p in range(first_page, last_page + 1):
+            page = self._pages.get(p)
+            if page is not None:
+                self._pages.move_to_end(p)
+                start = max(0, self.top - p * self.page_size)
+                rows.extend(page[start:])
+        rows = rows[:self.visible]
+
+        self.tree.delete(*self.tree.get_children())
+        for offset, row in enumerate(rows):
+            idx = self.top + offset
+            tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
+            self.tree.insert("", tk.END, iid=str(row[0]), values=self.format_row(row), tags=(tag,))
+        if self.selected_iid and self.tree.exists(self.selected_iid):
+            self.tree.selection_set(self.selected_iid)
+
+    def _fetch(self, pages):
+        query = self.query
+        self._loading = set(pages)
+
+        cursors = dict(self._cursors)
+
+        def load():
+            # continue from the previous page's cursor when we have it; a
+            # jump first seeks the cursor its page starts after
+            result = {}
+            for p in pages:
+                cursor = cursors[p] if p in cursors else self._seek(query, p, cursors)
+                if p and cursor is None:
+                    rows, nxt = [], None  # rows were removed since the count
+                else:
+                    rows, nxt = self.fetch_page(query, self.page_size, cursor)
+                result[p] = (cursor, rows, nxt)
+                cursors[p], cursors[p + 1] = cursor, nxt
+            return result
+
+        def done(result):
+            if query is not self.query:
+                return
+            for p, (cursor, rows, nxt) in result.items():
+                self._pages[p] = list(rows)
+                self._cursors[p], self._cursors[p + 1] = cursor, nxt
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+            self._loading.clear()
+            self._render()
+
+        # a newer scroll position supersedes a page request still in flight
+        self.executor.submit(self.key + ":page", load, on_done=done,
+                             on_error=lambda e: messagebox.showerror("DB Error", str(e)))
+
+    def _seek(self, query, page, cursors):
+        """Cursor that ``page`` starts after, walked from the closest known one."""
+        start = page * self.page_size
+        # (rows to walk, from cursor, reverse); the top and the end are always known
+        walks = [(start, None, False), (self.total - start + 1, None, True)]
+        for p, cursor in cursors.items():
+            if cursor is not None:
+                walks.append((abs(page - p) * self.page_size, cursor, p > page))
+        rows, cursor, reverse = min(walks, key=lambda w: w[0])
+        return self.seek(query, cursor, rows, reverse)
+
+    def _set_scrollbar(self):
+        if self.total <= 0:
+            self.vsb.set(0.0, 1.0)
+        else:
+            self.vsb.set(self.top / self.total, min(1.0, (self.top + self.visible) / self.total))
+
+    def clear_selection(self):
+        self.selected_iid = None
+        self.tree.selection_remove(self.tree.selection())
+
+
 class AdminAuth:
     def __init__(self):
         self.password_hash = load_admin_password_hash()
@@ -732,6 +408,134 @@ class AdminAuth:
         self.password_hash = h
         logging.info("Admin password changed")
 
+def render_analytics_png(stats, histogram, series, flows, dpi=90, backfill_pending=False):
+    """Draw the analytics charts with the Agg backend and return them as PNG bytes.
+
+    Needs no Tk, so it runs on a worker thread; ``series`` and ``histogram``
+    come from BankDB.get_balance_series() / get_balance_histogram(). With
+    ``backfill_pending`` the cash-flow chart is marked as missing older history.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    edges, counts = histogram
+    positions, balances = series
+    fig = Figure(figsize=(10, 8.5), dpi=dpi, facecolor='white')
+
+    # Pie: accounts by type (if available)
+    ax1 = fig.add_subplot(321)
+    by_type = stats.get('by_type', {})
+    if by_type:
+        colors = [COLORS['secondary'], COLORS['success'], COLORS['warning']]
+        ax1.pie(list(by_type.values()), labels=list(by_type.keys()), autopct='%1.1f%%',
+                colors=colors[:len(by_type)], startangle=90)
+        ax1.set_title('Accounts by Type', fontweight='bold')
+    else:
+        ax1.text(0.5, 0.5, "No account-type data", ha='center', va='center')
+
+    # Bar: status distribution
+    ax2 = fig.add_subplot(322)
+    status_data = {
+        'Active': stats.get('total_accounts', 0),
+        'Frozen': stats.get('frozen_accounts', 0)
+    }
+    colors_bar = [COLORS['success'], COLORS['warning']]
+    ax2.bar(status_data.keys(), status_data.values(), color=colors_bar)
+    ax2.set_title('Account Status Distribution', fontweight='bold')
+    ax2.set_ylabel('Count')
+
+    # Histogram: balance distribution, binned by the database
+    ax3 = fig.add_subplot(323)
+    ax3.hist(edges[:-1], bins=edges, weights=counts, color=COLORS['info'], edgecolor='white')
+    ax3.set_title('Balance Distribution', fontweight='bold')
+    ax3.set_xlabel('Balance')
+    ax3.set_ylabel('Number of Accounts')
+    ax3.ticklabel_format(style='plain', axis='x')
+
+    # Line: balance vs account index, LTTB-downsampled to ANALYTICS_POINTS
+    ax4 = fig.add_subplot(324)
+    ax4.plot(positions, balances, marker='o', markersize=2, linestyle='-', color=COLORS['accent'])
+    ax4.set_title('Balance vs Account (index)', fontweight='bold')
+    ax4.set_xlabel('Account (sorted index)')
+    ax4.set_ylabel('Balance')
+    ax4.grid(alpha=0.3)
+    ax4.ticklabel_format(style='plain', axis='y')
+
+    # Bars: monthly cash flow from the daily_flows rollup
+    ax5 = fig.add_subplot(313)
+    if flows:
+        months = [m.strftime('%Y-%m') for m, _ in flows]
+        inflow = [f['deposits'] + f['loan_disbursements'] for _, f in flows]
+        outflow = [-(f['withdrawals'] + f['debt_payments']) for _, f in flows]
+        ax5.bar(months, inflow, color=COLORS['success'], label='Deposits + loans')
+        ax5.bar(months, outflow, color=COLORS['warning'], label='Withdrawals + debt payments')
+        ax5.plot(months, [i + o for i, o in zip(inflow, outflow)], color=COLORS['accent'],
+                 marker='.', label='Net')
+        ax5.axhline(0, color='gray', linewidth=0.8)
+        ax5.legend(loc='upper left', fontsize=8)
+        step = max(1, len(months) // 12)
+        ax5.set_xticks(range(0, len(months), step))
+        ax5.set_xticklabels(months[::step], fontsize=8)
+    elif not backfill_pending:
+        ax5.text(0.5, 0.5, "No ledger activity yet", ha='center', va='center')
+    if backfill_pending:
+        ax5.text(0.5, 0.9, "Backfill pending: run 'bankcli.py backfill-flows' to include older history",
+                 ha='center', va='center', transform=ax5.transAxes, color=COLORS['warning'], fontsize=9)
+    ax5.set_title('Monthly Cash Flow' + (' (backfill pending)' if backfill_pending else ''), fontweight='bold')
+    ax5.ticklabel_format(style='plain', axis='y')
+
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    FigureCanvasAgg(fig).print_png(buf)
+    return buf.getvalue()
+
+
+class ChartCache:
+    """Rendered chart images keyed by BankDB.data_version().
+
+    The newest image is kept in memory and in ``directory`` so the
+    analytics window can show it at once, even right after a restart,
+    while a fresh one renders.
+    """
+
+    def __init__(self, directory=ANALYTICS_CACHE_DIR, name="analytics"):
+        self.directory = directory
+        self.name = name
+        self._lock = threading.Lock()
+        self._latest = None
+
+    def latest(self):
+        """``(version, png)`` of the newest cached image, or None."""
+        with self._lock:
+            if self._latest is None:
+                try:
+                    files = [f for f in os.listdir(self.directory)
+                             if f.startswith(self.name + "_") and f.endswith(".png")]
+                    if files:
+                        newest = max(files, key=lambda f: os.path.getmtime(os.path.join(self.directory, f)))
+                        with open(os.path.join(self.directory, newest), "rb") as f:
+                            self._latest = (newest[len(self.name) + 1:-4], f.read())
+                except OSError:
+                    pass
+            return self._latest
+
+    def put(self, version, png):
+        with self._lock:
+            self._latest = (version, png)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"{self.name}_{version}.png")
+                with open(path + ".tmp", "wb") as f:
+                    f.write(png)
+                os.replace(path + ".tmp", path)
+                for f in os.listdir(self.directory):
+                    if f.startswith(self.name + "_") and f != os.path.basename(path):
+                        os.remove(os.path.join(self.directory, f))
+            except OSError as e:
+                logging.warning(f"Could not store chart cache: {e}")
+
+
 class BankApp(tk.Tk):
     def __init__(self, db: BankDB):
         super().__init__()
@@ -747,6 +551,8 @@ class BankApp(tk.Tk):
         self.geometry("1400x800")
         self.configure(bg=COLORS['bg'])
         self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.executor = BackgroundExecutor(self, workers=UI_WORKERS)
+        self.chart_cache = ChartCache()
         
 
         self._apply_theme()
@@ -882,6 +688,7 @@ class BankApp(tk.Tk):
 
     def _on_close(self):
         try:
+            self.executor.shutdown()
             self.db.close()
         finally:
             self.destroy()
@@ -1001,7 +808,9 @@ class BankApp(tk.Tk):
         return frame
 
     def _update_dashboard(self):
-        stats = self.db.get_statistics()
+        self.executor.submit("dashboard", self.db.get_statistics, on_done=self._show_dashboard_stats)
+
+    def _show_dashboard_stats(self, stats):
         self.cards['total_accounts'].value_label.config(text=str(stats.get('total_accounts', 0)))
         self.cards['total_balance'].value_label.config(text=f"${stats.get('total_balance', 0):,.2f}")
         self.cards['avg_balance'].value_label.config(text=f"${stats.get('avg_balance', 0):,.2f}")
@@ -1118,20 +927,17 @@ class BankApp(tk.Tk):
         table_container.pack(fill=tk.BOTH, expand=True)
         
   
-        tree_frame = ttk.Frame(table_container)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-  
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical")
-        hsb = ttk.Scrollbar(tree_frame, orient="horizontal")
-        
         cols = ("id", "account_number", "name", "emirates_id", "balance", "account_type", "status", "created_at")
-        self.tree = ttk.Treeview(tree_frame, columns=cols, show="headings", 
-                                selectmode="browse", yscrollcommand=vsb.set, 
-                                xscrollcommand=hsb.set)
-        
-        vsb.config(command=self.tree.yview)
-        hsb.config(command=self.tree.xview)
+        self.grid_view = VirtualTreeview(
+            table_container, self.executor, cols,
+            fetch_page=lambda filters, limit, cursor: self.db.get_accounts_page(
+                filters=filters, cursor=cursor, limit=limit),
+            seek=lambda filters, cursor, rows, reverse: self.db.seek_accounts(
+                filters=filters, cursor=cursor, rows=rows, reverse=reverse),
+            count_rows=lambda filters: self.db.count_accounts(filters=filters),
+            format_row=self._format_account_row, key="accounts")
+        self.grid_view.frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree = self.grid_view.tree
         
 
         col_config = {
@@ -1150,15 +956,7 @@ class BankApp(tk.Tk):
             self.tree.column(col, width=width, anchor=anchor)
         
 
-        self.tree.grid(row=0, column=0, sticky='nsew')
-        vsb.grid(row=0, column=1, sticky='ns')
-        hsb.grid(row=1, column=0, sticky='ew')
-        
-        tree_frame.grid_rowconfigure(0, weight=1)
-        tree_frame.grid_columnconfigure(0, weight=1)
-        
-
-        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select, add="+")
         
    
         self.tree.tag_configure('evenrow', background=COLORS['highlight'])
@@ -1204,26 +1002,23 @@ class BankApp(tk.Tk):
     def _set_status(self, s):
         self.status_var.set(s)
 
-    def _refresh_tree(self, rows=None):
+    def _refresh_tree(self, filters=None, label="  Loaded"):
+        """Point the accounts grid at ``filters`` (all accounts by default) and reload it."""
         self._set_status("🔄 Refreshing accounts...")
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        try:
-            if rows is None:
-                rows = self.db.get_accounts()
-            for idx, row in enumerate(rows):
-                r = list(row)
-                try:
-                    r[4] = f"${float(r[4]):,.2f}"
-                except Exception:
-                    pass
-                tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-                self.tree.insert("", tk.END, values=r, tags=(tag,))
-            self._set_status(f"  Loaded {len(rows)} accounts")
+
+        def loaded(total):
+            self._set_status(f"{label} {total:,} accounts")
             self._update_dashboard()
-        except Exception as e:
-            messagebox.showerror("DB Error", str(e))
-            self._set_status("  Error loading accounts")
+
+        self.grid_view.load(dict(filters or {}), on_loaded=loaded)
+
+    def _format_account_row(self, row):
+        r = list(row)
+        try:
+            r[4] = f"${float(r[4]):,.2f}"
+        except Exception:
+            pass
+        return r
 
     def clear_form(self):
         self.selected_id = None
@@ -1250,7 +1045,7 @@ class BankApp(tk.Tk):
         self.ent_type.set("Savings")
         self.ent_status.set("Active")
         try:
-            self.tree.selection_remove(self.tree.selection())
+            self.grid_view.clear_selection()
         except Exception:
             pass
 
@@ -1261,6 +1056,9 @@ class BankApp(tk.Tk):
         vals = self.tree.item(sel[0], "values")
         if not vals:
             return
+        if self.selected_id == int(vals[0]):
+            # the grid re-selected the row after scrolling; the form is already loaded
+            return
         
         self.selected_id = int(vals[0])
         
@@ -1564,12 +1362,7 @@ class BankApp(tk.Tk):
             elif col == "Emirates ID":
                 filters["search"] = term; filters["search_col"] = "emirates_id"
         
-        try:
-            rows = self.db.get_accounts(filters=filters)
-            self._refresh_tree(rows=rows)
-            self._set_status(f"🔍 Found {len(rows)} accounts")
-        except Exception as e:
-            messagebox.showerror("Search Error", str(e))
+        self._refresh_tree(filters, label="🔍 Found")
 
     def _ask_amount(self, prompt):
         dialog = tk.Toplevel(self)
@@ -1698,13 +1491,8 @@ class BankApp(tk.Tk):
             if to_date:
                 filters["date_to"] = to_date
             
-            try:
-                rows = self.db.get_accounts(filters=filters)
-                self._refresh_tree(rows=rows)
-                self._set_status(f"🔍 Advanced search: {len(rows)} results")
-                dialog.destroy()
-            except Exception as e:
-                messagebox.showerror("Search Error", str(e), parent=dialog)
+            self._refresh_tree(filters, label="🔍 Advanced search:")
+            dialog.destroy()
         
         btn_frame = ttk.Frame(dialog)
         btn_frame.pack(pady=20)
@@ -1713,8 +1501,6 @@ class BankApp(tk.Tk):
 
     def _show_statistics(self):
         """Show detailed statistics dashboard"""
-        stats = self.db.get_statistics()
-        
         win = tk.Toplevel(self)
         win.title(" Statistics Dashboard")
         win.geometry("800x600")
@@ -1727,8 +1513,61 @@ class BankApp(tk.Tk):
         
         content = ttk.Frame(win)
         content.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        text_widget = tk.Text(content, font=('Consolas', 11), wrap=tk.WORD, 
+                             bg=COLORS['light'], relief=tk.FLAT, padx=20, pady=20)
+        text_widget.pack(fill=tk.BOTH, expand=True)
+        text_widget.insert('1.0', "Loading statistics...")
+        text_widget.config(state=tk.DISABLED)
         
+        ModernButton(win, text="  Close", command=win.destroy, style="secondary").pack(pady=10)
 
+        def show(stats):
+            if not win.winfo_exists():
+                return
+            text_widget.config(state=tk.NORMAL)
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert('1.0', self._format_statistics(stats))
+            text_widget.config(state=tk.DISABLED)
+
+        self.executor.submit("statistics", self.db.get_statistics, on_done=show,
+                             on_error=lambda e: messagebox.showerror("DB Error", str(e), parent=win))
+
+    def _verify_summary(self):
+        """Recount accounts and compare against the incremental summary tables"""
+        def done(drift):
+            if not drift:
+                messagebox.showinfo("Verify Summary", "Summary tables match the accounts table.", parent=self)
+                return
+            lines = "\n".join(" ".join(f"{k}={v}" for k, v in d.items()) for d in drift[:20])
+            if messagebox.askyesno("Verify Summary",
+                                   f"{len(drift)} drift entries found:\n\n{lines}\n\nRebuild the summary now?",
+                                   parent=self):
+                self.executor.submit("summary", self.db.rebuild_summary, on_done=lambda _: self._update_dashboard(),
+                                     on_error=lambda e: messagebox.showerror("DB Error", str(e), parent=self))
+
+        self.executor.submit("summary", self.db.verify_summary, on_done=done,
+                             on_error=lambda e: messagebox.showerror("DB Error", str(e), parent=self))
+
+    def _archive_transactions(self):
+        """Move old ledger rows into the archive table in the background"""
+        days = simpledialog.askinteger("Archive Transactions", "Archive transactions older than (days):",
+                                       initialvalue=ARCHIVE_AFTER_DAYS, minvalue=1, parent=self)
+        if not days:
+            return
+
+        def progress(moved):
+            self.executor.post(self._set_status, f"  Archiving transactions... {moved:,} rows")
+
+        def done(moved):
+            messagebox.showinfo("Archive Transactions", f"{moved:,} transactions archived.", parent=self)
+            self._set_status(f"  Archived {moved:,} transactions")
+
+        self._set_status("  Archiving transactions...")
+        self.executor.submit("archive", self.db.archive_transactions, days, progress=progress, on_done=done,
+                             on_error=lambda e: messagebox.showerror("DB Error", str(e), parent=self))
+
+    def _format_statistics(self, stats):
         stats_text = f"""
   ACCOUNT STATISTICS
 {'='*50}
@@ -1749,28 +1588,48 @@ Average Balance: ${stats.get('avg_balance', 0):,.2f}
         
         for acc_type, count in stats.get('by_type', {}).items():
             stats_text += f"{acc_type}: {count:,} accounts\n"
-        
-        text_widget = tk.Text(content, font=('Consolas', 11), wrap=tk.WORD, 
-                             bg=COLORS['light'], relief=tk.FLAT, padx=20, pady=20)
-        text_widget.pack(fill=tk.BOTH, expand=True)
-        text_widget.insert('1.0', stats_text)
-        text_widget.config(state=tk.DISABLED)
-        
-        ModernButton(win, text="  Close", command=win.destroy, style="secondary").pack(pady=10)
+
+        pool = self.db.pool_stats()
+        if pool:
+            stats_text += f"""
+    CONNECTION POOL
+{'='*50}
+
+Pool Size: {pool['pool_size']}
+Connections In Use: {pool['connections_in_use']} / {pool['connections_open']} open
+Checkouts: {pool['checkouts']:,} ({pool['waits']:,} had to wait)
+Avg / Max Wait: {pool['wait_time_avg']*1000:.2f} ms / {pool['wait_time_max']*1000:.2f} ms
+Reconnects: {pool['reconnects']}
+"""
+
+        txn = self.db.txn_stats()
+        stats_text += f"""
+    TRANSFER CONTENTION
+{'='*50}
+
+Deadlocks: {txn['deadlock']:,}
+Lock Wait Timeouts: {txn['lock_timeout']:,}
+Retried: {txn['retries']:,}
+Gave Up: {txn['gave_up']:,}
+"""
+        return stats_text
 
 # ...existing code...
     def _show_analytics(self):
-        """Show account analytics with charts - includes balance distribution and balance vs account index."""
+        """Show account analytics with charts - includes balance distribution and balance vs account index.
+
+        The last rendered image is shown straight away; the charts are
+        re-rendered off the Tk thread only when BankDB.data_version() moved.
+        """
         try:
-            import matplotlib.pyplot as plt
-            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            import matplotlib
         except ImportError:
             messagebox.showerror("Missing Library", "Matplotlib is required for analytics")
             return
 
         win = tk.Toplevel(self)
         win.title("    Account Analytics")
-        win.geometry("1000x700")
+        win.geometry("1000x900")
         win.configure(bg='white')
 
         header = tk.Frame(win, bg=COLORS['secondary'])
@@ -1778,84 +1637,54 @@ Average Balance: ${stats.get('avg_balance', 0):,.2f}
         tk.Label(header, text="    Account Analytics & Charts",
                  font=('Segoe UI', 14, 'bold'), bg=COLORS['secondary'], fg='white').pack(pady=15)
 
-        stats = self.db.get_statistics()
-
-        # fetch balances from DB
-        cur = self.db.conn.cursor()
-        try:
-            cur.execute("SELECT id, balance FROM accounts WHERE balance IS NOT NULL")
-            rows = cur.fetchall()
-        finally:
-            cur.close()
-
-        ids = []
-        balances = []
-        for r in rows:
-            try:
-                ids.append(int(r[0]))
-                balances.append(float(r[1] or 0.0))
-            except Exception:
-                continue
-
-        if not balances:
-            messagebox.showinfo("No Data", "No account balance data available for analytics.", parent=win)
-            win.destroy()
-            return
+        status = tk.Label(win, text="Loading analytics...", font=('Segoe UI', 10), bg='white', fg='gray')
+        status.pack(pady=(8, 0))
+        chart = tk.Label(win, bg='white')
+        chart.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        ModernButton(win, text="  Close", command=win.destroy, style="secondary").pack(pady=10)
 
-        fig = Figure(figsize=(10, 6), facecolor='white')
+        def show(png):
+            image = tk.PhotoImage(data=base64.b64encode(png).decode("ascii"))
+            chart.configure(image=image)
+            chart.image = image  # keep a reference or Tk drops the picture
+
+        cached = self.chart_cache.latest()
+        if cached:
+            show(cached[1])
+            status.configure(text="Checking for newer data...")
+
+        def render():
+            version = self.db.data_version()
+            if cached and cached[0] == version:
+                return None
+            series = self.db.get_balance_series()
+            if not len(series[1]):
+                return b""
+            # older history reaches daily_flows through the bankcli backfill-flows job
+            png = render_analytics_png(self.db.get_statistics(), self.db.get_balance_histogram(), series,
+                                       self.db.get_daily_flows(period="month"),
+                                       backfill_pending=self.db.flows_backfill_pending())
+            self.chart_cache.put(version, png)
+            return png
+
+        def done(png):
+            if not win.winfo_exists():
+                return
+            if png == b"":
+                messagebox.showinfo("No Data", "No account balance data available for analytics.", parent=win)
+                win.destroy()
+                return
+            if png:
+                show(png)
+            status.configure(text=f"Up to date as of {datetime.now():%H:%M:%S}")
 
-        # Pie: accounts by type (if available)
-        ax1 = fig.add_subplot(221)
-        by_type = stats.get('by_type', {})
-        if by_type:
-            colors = [COLORS['secondary'], COLORS['success'], COLORS['warning']]
-            ax1.pie(list(by_type.values()), labels=list(by_type.keys()), autopct='%1.1f%%',
-                    colors=colors[:len(by_type)], startangle=90)
-            ax1.set_title('Accounts by Type', fontweight='bold')
-        else:
-            ax1.text(0.5, 0.5, "No account-type data", ha='center', va='center')
+        def failed(e):
+            if win.winfo_exists():
+                messagebox.showerror("DB Error", str(e), parent=win)
+                if not cached:
+                    win.destroy()
 
-        # Bar: status distribution
-        ax2 = fig.add_subplot(222)
-        status_data = {
-            'Active': stats.get('total_accounts', 0),
-            'Frozen': stats.get('frozen_accounts', 0)
-        }
-        colors_bar = [COLORS['success'], COLORS['warning']]
-        ax2.bar(status_data.keys(), status_data.values(), color=colors_bar)
-        ax2.set_title('Account Status Distribution', fontweight='bold')
-        ax2.set_ylabel('Count')
-
-        # Histogram: balance distribution
-        ax3 = fig.add_subplot(223)
-        # sensible bins
-        max_bal = max(balances)
-        bins = [0, 1000, 5000, 10000, 50000, max(50000, max_bal) * 1.1]
-        ax3.hist(balances, bins=bins, color=COLORS['info'], edgecolor='white')
-        ax3.set_title('Balance Distribution', fontweight='bold')
-        ax3.set_xlabel('Balance')
-        ax3.set_ylabel('Number of Accounts')
-        ax3.ticklabel_format(style='plain', axis='x')
-
-        # Scatter / line: balance vs account index (sorted)
-        ax4 = fig.add_subplot(224)
-        sorted_pairs = sorted(zip(ids, balances), key=lambda x: x[0])
-        idxs = list(range(1, len(sorted_pairs) + 1))
-        sorted_balances = [b for (_, b) in sorted_pairs]
-        ax4.plot(idxs, sorted_balances, marker='o', linestyle='-', color=COLORS['accent'])
-        ax4.set_title('Balance vs Account (index)', fontweight='bold')
-        ax4.set_xlabel('Account (sorted index)')
-        ax4.set_ylabel('Balance')
-        ax4.grid(alpha=0.3)
-        ax4.ticklabel_format(style='plain', axis='y')
-
-        fig.tight_layout()
-
-        canvas = FigureCanvasTkAgg(fig, master=win)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        ModernButton(win, text="  Close", command=win.destroy, style="secondary").pack(pady=10)
+        self.executor.submit("analytics", render, on_done=done, on_error=failed)
 
     def _bulk_operations(self):
         dialog = tk.Toplevel(self)
@@ -1904,10 +1733,17 @@ Average Balance: ${stats.get('avg_balance', 0):,.2f}
         sample = "1002,250.00,monthly bonus\n1005,1000\n1010,50,refund"
         txt.insert('1.0', sample)
 
+        mode_var = tk.StringVar(value="atomic")
+        mode_frame = ttk.Frame(dialog)
+        mode_frame.pack(anchor=tk.W, padx=12)
+        ttk.Radiobutton(mode_frame, text="All or nothing", variable=mode_var, value="atomic").pack(side=tk.LEFT)
+        ttk.Radiobutton(mode_frame, text="Best effort (skip failed lines)", variable=mode_var,
+                        value="best_effort").pack(side=tk.LEFT, padx=12)
+
         progress_var = tk.StringVar(value="")
         ttk.Label(dialog, textvariable=progress_var).pack(pady=(4,0))
 
-        def do_bulk():
+        def do_bulk(dry_run=False):
             try:
                 if use_selected_var.get():
                     if not self.selected_id:
@@ -1930,8 +1766,6 @@ Average Balance: ${stats.get('avg_balance', 0):,.2f}
                 return
 
             parsed = []
-            dest_ids = set()
-            total_amount = 0.0
             for ln_num, line in enumerate(lines, start=1):
                 parts = [p.strip() for p in line.split(',', 2)]
                 if len(parts) < 2:
@@ -1945,120 +1779,76 @@ Average Balance: ${stats.get('avg_balance', 0):,.2f}
                         return
                     note = parts[2] if len(parts) >= 3 else None
                     parsed.append((ln_num, to_id, amount, note, line))
-                    dest_ids.add(to_id)
-                    total_amount += amount
                 except ValueError:
                     messagebox.showerror("Parse Error", f"Line {ln_num} has invalid numbers: '{line}'", parent=dialog)
                     return
 
-            if dest_ids:
-                placeholders = ",".join(["%s"] * len(dest_ids))
-                cur = self.db.conn.cursor()
-                try:
-                    cur.execute(f"SELECT id FROM accounts WHERE id IN ({placeholders})", tuple(dest_ids))
-                    found = {row[0] for row in cur.fetchall()}
-                finally:
-                    cur.close()
-                missing = sorted(list(dest_ids - found))
-                if missing:
-                    if not messagebox.askyesno("Missing Destinations",
-                                               f"The following destination account IDs were not found:\n{missing}\n\nDo you want to continue and skip missing entries?",
-                                               parent=dialog):
-                        return
+            transfers = [(to_id, amount, note) for _, to_id, amount, note, _ in parsed]
+            atomic = mode_var.get() == "atomic"
+            progress_var.set(f"{'Validating' if dry_run else 'Processing'} {len(transfers)} transfers ...")
 
-          
-            cur = self.db.conn.cursor()
-            try:
-                cur.execute("SELECT balance FROM accounts WHERE id=%s", (src_id,))
-                row = cur.fetchone()
-            finally:
-                cur.close()
-            if not row:
-                messagebox.showerror("Source Not Found", f"Source account {src_id} not found", parent=dialog)
-                return
-            source_balance = float(row[0] or 0.0)
-            if total_amount > source_balance:
-                if not messagebox.askyesno("Insufficient Funds",
-                                           f"Total required: ${total_amount:,.2f}\nSource balance: ${source_balance:,.2f}\n\nDo you want to continue and attempt transfers until funds run out?",
-                                           parent=dialog):
+            def show_summary(result):
+                progress_var.set("")
+                if not dialog.winfo_exists():
                     return
-                
-            successes = []
-            failures = []
-            total = len(parsed)
-            for i, (ln_num, to_id, amount, note, line) in enumerate(parsed, start=1):
-                progress_var.set(f"Processing {i}/{total} ...")
-                dialog.update_idletasks()
-                try:
-                  
-                    cur = self.db.conn.cursor()
-                    try:
-                        cur.execute("SELECT id FROM accounts WHERE id=%s", (to_id,))
-                        if not cur.fetchone():
-                            raise ValueError("Destination account not found")
-                    finally:
-                        cur.close()
-
-               
-                    try:
-                        self.db.transfer_funds(src_id, to_id, amount, note)
-                        successes.append((to_id, amount))
-                    except Exception as e:
-                        failures.append((line, str(e)))
-                        
-                        if "Insufficient funds" in str(e) or "Insufficient funds in source account" in str(e):
-                            break
-                except Exception as e:
-                    failures.append((line, str(e)))
-
-        
-            summary = tk.Toplevel(dialog)
-            summary.title("Bulk Transfer Summary")
-            summary.geometry("700x440")
-            summary.transient(dialog)
-            summary.grab_set()
-
-            ttk.Label(summary, text="Bulk Transfer Summary", font=('Segoe UI', 12, 'bold')).pack(pady=8)
-            txt_sum = tk.Text(summary, wrap=tk.WORD)
-            txt_sum.pack(fill=tk.BOTH, expand=True, padx=8, pady=6)
-
-
-
-            btns = ttk.Frame(summary)
-            btns.pack(pady=8)
-            ModernButton(btns, text="Close & Continue", command=summary.destroy, style="info").pack(side=tk.LEFT, padx=6)
-            ModernButton(btns, text="Finish", command=lambda: (summary.destroy(), dialog.destroy()), 
-                        style="success").pack(side=tk.LEFT, padx=6)
-
-
-            summary.focus_force()
-
-            txt_sum.insert(tk.END, f"Source Account: {src_id}\n")
-            txt_sum.insert(tk.END, f"Total lines: {total}\n")
-            txt_sum.insert(tk.END, f"Successful transfers: {len(successes)}\n")
-            txt_sum.insert(tk.END, f"Failed transfers: {len(failures)}\n\n")
-            if successes:
-                txt_sum.insert(tk.END, "SUCCESS:\n")
-                for to_id, amt in successes:
-                    txt_sum.insert(tk.END, f"  -> To {to_id}: ${amt:,.2f}\n")
-                txt_sum.insert(tk.END, "\n")
-            if failures:
-                txt_sum.insert(tk.END, "FAILURES:\n")
-                for line, err in failures:
-                    txt_sum.insert(tk.END, f"  Line: {line}\n    Error: {err}\n")
-            txt_sum.config(state=tk.DISABLED)
-
-            btns = ttk.Frame(summary)
-            btns.pack(pady=8)
-            ttk.Button(btns, text="Close", command=summary.destroy).pack(side=tk.LEFT, padx=6)
-            ttk.Button(btns, text="Close All", command=lambda: (summary.destroy(), dialog.destroy())).pack(side=tk.LEFT, padx=6)
-
-            self._refresh_tree()
-            self._set_status(f"Bulk transfer done: {len(successes)} success, {len(failures)} failures")
-            logging.info(f"Bulk transfer completed: {len(successes)} success, {len(failures)} failures")
+                applied, failures = result['applied'], result['failed']
+                title = "Bulk Transfer Dry Run" if dry_run else "Bulk Transfer Summary"
+
+                summary = tk.Toplevel(dialog)
+                summary.title(title)
+                summary.geometry("700x440")
+                summary.transient(dialog)
+                summary.grab_set()
+
+                ttk.Label(summary, text=title, font=('Segoe UI', 12, 'bold')).pack(pady=8)
+                txt_sum = tk.Text(summary, wrap=tk.WORD)
+                txt_sum.pack(fill=tk.BOTH, expand=True, padx=8, pady=6)
+
+                txt_sum.insert(tk.END, f"Source Account: {src_id}\n")
+                txt_sum.insert(tk.END, f"Mode: {'all-or-nothing' if atomic else 'best effort'}\n")
+                txt_sum.insert(tk.END, f"Total lines: {len(parsed)}\n")
+                if dry_run:
+                    txt_sum.insert(tk.END, "Dry run: nothing was applied\n")
+                elif not result['committed']:
+                    txt_sum.insert(tk.END, "Nothing was applied\n")
+                txt_sum.insert(tk.END, f"{'Valid' if dry_run else 'Successful'} transfers: {len(applied)}\n")
+                txt_sum.insert(tk.END, f"Failed transfers: {len(failures)}\n")
+                txt_sum.insert(tk.END, f"Source balance {'would be' if dry_run else 'now'}: ${result['balance']:,.2f}\n\n")
+                if failures:
+                    txt_sum.insert(tk.END, "FAILURES:\n")
+                    for index, to_id, amount, err in failures:
+                        txt_sum.insert(tk.END, f"  Line {parsed[index][0]}: {parsed[index][4]}\n    Error: {err}\n")
+                    txt_sum.insert(tk.END, "\n")
+                if applied:
+                    txt_sum.insert(tk.END, "SUCCESS:\n" if not dry_run else "VALID:\n")
+                    for index, to_id, amount in applied[:1000]:
+                        txt_sum.insert(tk.END, f"  -> To {to_id}: ${amount:,.2f}\n")
+                    if len(applied) > 1000:
+                        txt_sum.insert(tk.END, f"  ... and {len(applied) - 1000} more\n")
+                txt_sum.config(state=tk.DISABLED)
+
+                btns = ttk.Frame(summary)
+                btns.pack(pady=8)
+                ttk.Button(btns, text="Close", command=summary.destroy).pack(side=tk.LEFT, padx=6)
+                ttk.Button(btns, text="Close All", command=lambda: (summary.destroy(), dialog.destroy())).pack(side=tk.LEFT, padx=6)
+                summary.focus_force()
+
+                if result['committed']:
+                    self._refresh_tree()
+                    self._update_dashboard()
+                    self._set_status(f"Bulk transfer done: {len(applied)} success, {len(failures)} failures")
+                    logging.info(f"Bulk transfer completed: {len(applied)} success, {len(failures)} failures")
+
+            def show_error(e):
+                progress_var.set("")
+                messagebox.showerror("Bulk Transfer Failed", str(e), parent=dialog)
+
+            self.executor.submit("bulk_transfer", self.db.transfer_many, src_id, transfers,
+                                 atomic=atomic, dry_run=dry_run, on_done=show_summary, on_error=show_error)
 
         btn_frame = ttk.Frame(dialog)
         btn_frame.pack(pady=10)
+        ModernButton(btn_frame, text="Dry Run", command=lambda: do_bulk(dry_run=True), style="info", width=12).pack(side=tk.LEFT, padx=6)
         ModernButton(btn_frame, text="Start Bulk Transfer", command=do_bulk, style="success", width=18).pack(side=tk.LEFT, padx=6)
         ModernButton(btn_frame, text="Cancel", command=dialog.destroy, style="danger", width=12).pack(side=tk.LEFT, padx=6)
 
@@ -2066,34 +1856,7 @@ Average Balance: ${stats.get('avg_balance', 0):,.2f}
 
     def _generate_report(self):
    
-        stats = self.db.get_statistics()
-        
-        report = f"""
-{'='*60}
-        BANK MANAGEMENT SYSTEM - COMPREHENSIVE REPORT
-{'='*60}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-ACCOUNT OVERVIEW
-{'-'*60}
-Total Active Accounts:        {stats.get('total_accounts', 0):>10,}
-Frozen Accounts:              {stats.get('frozen_accounts', 0):>10,}
-New Accounts (Last 30 Days):  {stats.get('new_accounts_30d', 0):>10,}
-
-FINANCIAL SUMMARY
-{'-'*60}
-Total Balance:                ${stats.get('total_balance', 0):>10,.2f}
-Average Balance:              ${stats.get('avg_balance', 0):>10,.2f}
-
-ACCOUNT TYPE BREAKDOWN
-{'-'*60}
-"""
-        
-        for acc_type, count in stats.get('by_type', {}).items():
-            report += f"{acc_type:<30} {count:>10,}\n"
-        
-        report += f"\n{'='*60}\n"
-        
+        report = format_report(self.db.get_statistics())
 
         filename = filedialog.asksaveasfilename(
             defaultextension=".txt",
@@ -2113,6 +1876,19 @@ ACCOUNT TYPE BREAKDOWN
 
 
 
+    def _run_export(self, key, what, export, *args, **kwargs):
+        """Run a streaming export in the background with row-count progress in the status bar."""
+        def progress(rows):
+            self.executor.post(self._set_status, f"  Exporting {what}... {rows:,} rows")
+
+        def done(rows):
+            messagebox.showinfo("  Exported", f"{rows:,} {what} exported to:\n{args[0]}")
+            self._set_status(f"  {what.capitalize()} exported ({rows:,} rows)")
+
+        self._set_status(f"  Exporting {what}...")
+        self.executor.submit(key, export, *args, progress=progress, on_done=done,
+                             on_error=lambda e: messagebox.showerror("Export Error", str(e)), **kwargs)
+
     def _export_all_accounts(self):
         fn = filedialog.asksaveasfilename(
             defaultextension=".csv",
@@ -2121,12 +1897,40 @@ ACCOUNT TYPE BREAKDOWN
         )
         if not fn:
             return
-        try:
-            self.db.export_accounts_csv(fn)
-            messagebox.showinfo("  Exported", f"All accounts exported to:\n{fn}")
-            self._set_status("  Accounts exported")
-        except Exception as e:
-            messagebox.showerror("Export Error", str(e))
+        self._run_export("export_accounts", "accounts", self.db.export_accounts_csv, fn)
+
+    def _import_accounts(self):
+        fn = filedialog.askopenfilename(
+            title="Import Accounts",
+            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")],
+            parent=self
+        )
+        if not fn:
+            return
+
+        def done(result):
+            rejected = result['rejected']
+            msg = (f"Imported {result['imported']:,} accounts in {result['seconds']:.1f}s "
+                   f"({result['rows_per_sec']:,.0f} rows/s).\nRejected rows: {len(rejected):,}")
+            if rejected:
+                report = os.path.splitext(fn)[0] + "_rejected.csv"
+                try:
+                    with open(report, "w", newline='', encoding="utf-8") as f:
+                        w = csv.writer(f)
+                        w.writerow(["line", "error"] + list(BankDB.IMPORT_COLUMNS))
+                        for ln, row, err in rejected:
+                            w.writerow([ln, err] + [row.get(c, "") for c in BankDB.IMPORT_COLUMNS])
+                    msg += f"\n\nRejected rows written to:\n{report}"
+                except OSError as e:
+                    msg += f"\n\nCould not write rejected rows: {e}"
+            messagebox.showinfo("  Import Finished", msg)
+            self._set_status(f"  Imported {result['imported']:,} accounts ({result['rows_per_sec']:,.0f} rows/s)")
+            self._refresh_tree()
+            self._update_dashboard()
+
+        self._set_status("  Importing accounts...")
+        self.executor.submit("import_accounts", self.db.import_accounts_csv, fn, on_done=done,
+                             on_error=lambda e: messagebox.showerror("Import Error", str(e)))
 
     def _export_filtered_accounts(self):
         term = simpledialog.askstring("Export Filter", 
@@ -2144,12 +1948,7 @@ ACCOUNT TYPE BREAKDOWN
         if not fn:
             return
         
-        try:
-            self.db.export_accounts_csv(fn, filters=filters)
-            messagebox.showinfo("  Exported", f"Filtered accounts exported to:\n{fn}")
-            self._set_status("  Filtered export complete")
-        except Exception as e:
-            messagebox.showerror("Export Error", str(e))
+        self._run_export("export_filtered", "accounts", self.db.export_accounts_csv, fn, filters=filters)
 
     def _export_transactions_selected(self):
         if not self.selected_id:
@@ -2164,12 +1963,8 @@ ACCOUNT TYPE BREAKDOWN
         if not fn:
             return
         
-        try:
-            self.db.export_transactions_csv(fn, acc_id=self.selected_id)
-            messagebox.showinfo("  Exported", f"Transactions exported to:\n{fn}")
-            self._set_status("  Transactions exported")
-        except Exception as e:
-            messagebox.showerror("Export Error", str(e))
+        self._run_export("export_transactions", "transactions", self.db.export_transactions_csv, fn,
+                         acc_id=self.selected_id)
 
     def _export_transactions_window(self, acc_id=None):
         fn = filedialog.asksaveasfilename(
@@ -2180,12 +1975,67 @@ ACCOUNT TYPE BREAKDOWN
         if not fn:
             return
         
-        try:
-            self.db.export_transactions_csv(fn, acc_id=acc_id)
-            messagebox.showinfo("  Exported", f"Transactions exported to:\n{fn}")
-        except Exception as e:
-            messagebox.showerror("Export Error", str(e))
+        self._run_export("export_transactions", "transactions", self.db.export_transactions_csv, fn,
+                         acc_id=acc_id)
+
+
+    def _export_job_dialog(self):
+        dialog = tk.Toplevel(self)
+        dialog.title("Ledger Export Job")
+        dialog.geometry("420x240")
+        dialog.transient(self)
+
+        form = ttk.Frame(dialog, padding=12)
+        form.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(form, text="Partition by:").grid(row=0, column=0, sticky=tk.W, pady=4)
+        part_combo = ttk.Combobox(form, values=["month", "account"], state="readonly", width=18)
+        part_combo.set("month")
+        part_combo.grid(row=0, column=1, sticky=tk.W, pady=4)
+        ttk.Label(form, text="Format:").grid(row=1, column=0, sticky=tk.W, pady=4)
+        fmt_combo = ttk.Combobox(form, values=["csv", "jsonl"], state="readonly", width=18)
+        fmt_combo.set("csv")
+        fmt_combo.grid(row=1, column=1, sticky=tk.W, pady=4)
+        ttk.Label(form, text="Workers:").grid(row=2, column=0, sticky=tk.W, pady=4)
+        workers = ttk.Spinbox(form, from_=1, to=64, width=6)
+        workers.set(EXPORT_WORKERS)
+        workers.grid(row=2, column=1, sticky=tk.W, pady=4)
+        progress_var = tk.StringVar(value="")
+        ttk.Label(form, textvariable=progress_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=8)
+
+        def start():
+            directory = filedialog.askdirectory(title="Export Directory", parent=dialog)
+            if not directory:
+                return
+            try:
+                n_workers = max(1, int(workers.get()))
+            except ValueError:
+                messagebox.showerror("Invalid Input", "Workers must be a number", parent=dialog)
+                return
+
+            def progress(done, total):
+                self.executor.post(progress_var.set, f"Partitions written: {done}/{total}")
 
+            def done(manifest):
+                progress_var.set("")
+                messagebox.showinfo("  Export Job Finished",
+                                    f"{manifest['total_rows']:,} transactions in {len(manifest['files'])} files "
+                                    f"({manifest['seconds']:.1f}s).\n\nManifest:\n"
+                                    f"{os.path.join(directory, 'manifest.json')}")
+                self._set_status(f"  Ledger export job finished ({manifest['total_rows']:,} rows)")
+
+            def failed(e):
+                progress_var.set("")
+                messagebox.showerror("Export Error", str(e))
+
+            progress_var.set("Planning partitions...")
+            self.executor.submit("export_job", self.db.export_transactions_job, directory,
+                                 partition_by=part_combo.get(), fmt=fmt_combo.get(), partitions=n_workers,
+                                 workers=n_workers, progress=progress, on_done=done, on_error=failed)
+
+        btns = ttk.Frame(dialog)
+        btns.pack(pady=8)
+        ModernButton(btns, text="Start", command=start, style="success", width=12).pack(side=tk.LEFT, padx=6)
+        ModernButton(btns, text="Close", command=dialog.destroy, style="secondary", width=12).pack(side=tk.LEFT, padx=6)
 
     def _view_logs(self):
         win = tk.Toplevel(self)
@@ -2381,7 +2231,7 @@ TECHNOLOGY STACK
  MySQL Database
  Matplotlib (Analytics)
 
-DATABASE: {DB_NAME}@{DB_HOST}:{DB_PORT}
+DATABASE: {self.db.backend.describe()}
 
 {datetime.now().year} Bank Management System
 All rights reserved.
@@ -2575,9 +2425,12 @@ All rights reserved.
         
 
         file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label=" Import Accounts (CSV)", command=self._import_accounts)
         file_menu.add_command(label=" Export All Accounts", command=self._export_all_accounts)
         file_menu.add_command(label=" Export Filtered", command=self._export_filtered_accounts)
         file_menu.add_command(label=" Export Transactions", command=self._export_transactions_selected)
+        file_menu.add_command(label=" Export Full Ledger", command=self._export_transactions_window)
+        file_menu.add_command(label=" Ledger Export Job...", command=self._export_job_dialog)
         file_menu.add_separator()
         file_menu.add_command(label=" Generate Report", command=self._generate_report)
         file_menu.add_separator()
@@ -2590,6 +2443,8 @@ All rights reserved.
         admin_menu.add_command(label=" View Logs", command=self._view_logs)
         admin_menu.add_separator()
         admin_menu.add_command(label=" Statistics Dashboard", command=self._show_statistics)
+        admin_menu.add_command(label=" Verify Summary", command=self._verify_summary)
+        admin_menu.add_command(label=" Archive Old Transactions", command=self._archive_transactions)
         menubar.add_cascade(label="Admin", menu=admin_menu)
         
     
@@ -2618,7 +2473,8 @@ All rights reserved.
 
 def main():
     try:
-        db = BankDB()
+        # a shared single connection would make Tk-thread reads wait behind background jobs
+        db = BankDB(pool_size=max(DB_POOL_SIZE, UI_WORKERS + 1))
     except Exception as e:
         root = tk.Tk()
         root.withdraw()
@@ -2638,4 +2494,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # the batch jobs used to be flags of this script; they now run through bankcli
+    flags = sys.argv[1:]
+    if "--verify-summary" in flags:
+        import bankcli
+        sys.exit(bankcli.main(["verify-summary"] + (["--repair"] if "--repair" in flags else [])))
+    if "--backfill-flows" in flags:
+        import bankcli
+        sys.exit(bankcli.main(["backfill-flows"]))
+    if "--archive-transactions" in flags:
+        import bankcli
+        rest = flags[flags.index("--archive-transactions") + 1:]
+        sys.exit(bankcli.main(["archive"] + (["--days", rest[0]] if rest and rest[0].isdigit() else [])))
+    main()
@@ -2,18 +2,34 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime
-from bankmanagementsystem import BankDB  
+from bankcore import BankDB, BackgroundExecutor, DB_POOL_SIZE
+
+RECENT_TRANSACTIONS = 200  # ledger rows kept in the dashboard list
+POLL_MS = 5000             # how often the dashboard checks for changes made elsewhere
+PORTAL_WORKERS = 2         # BackgroundExecutor threads (export, poll)
+
+
 class ClientApp(tk.Tk):
     def __init__(self, db: BankDB):
         super().__init__()
         self.db = db
         self.account = None  # will hold tuple returned by db.get_account()
+        self.last_txn_id = None  # highest ledger id the dashboard has read up to
+        self._poll_job = None
+        self._writes = 0  # local writes so far; a poll started before the latest one is stale
         self.title("Customer Portal - Bank")
         self.geometry("700x520")
         self.configure(bg="#f7f7f7")
+        self.executor = BackgroundExecutor(self, workers=PORTAL_WORKERS)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self._build_login_ui()
 
+    def _on_close(self):
+        self._stop_polling()
+        self.executor.shutdown()
+        self.destroy()
+
     def _build_login_ui(self):
         for w in self.winfo_children():
             w.destroy()
@@ -49,24 +65,9 @@ class ClientApp(tk.Tk):
             return
 
         try:
-            # Try numeric id first
-            acc = None
-            try:
-                acc_id = int(ident)
-                acc = self.db.get_account(acc_id)
-            except ValueError:
-                # not numeric => search by account_number
-                rows = self.db.get_accounts(filters={"search": ident, "search_col": "account_number"})
-                acc = rows[0] if rows else None
-
+            acc = self.db.find_account_for_login(ident, eid)
             if not acc:
-                messagebox.showerror("Not found", "Account not found")
-                return
-
-            # acc tuple: (id, account_number, name, emirates_id, balance, phone, email, account_type, status, created_at)
-            # verify emirates id
-            if not acc[3] or acc[3].strip() != eid:
-                messagebox.showerror("Verification failed", "Emirates ID does not match")
+                messagebox.showerror("Login failed", "Account not found or Emirates ID does not match")
                 return
 
             self.account = acc
@@ -113,6 +114,8 @@ class ClientApp(tk.Tk):
         ttk.Button(act_frame, text="Transfer", command=self._transfer_dialog).pack(fill=tk.X, pady=4)
         ttk.Button(act_frame, text="Update Contact", command=self._update_contact_dialog).pack(fill=tk.X, pady=4)
         ttk.Button(act_frame, text="Export Transactions (CSV)", command=self._export_transactions).pack(fill=tk.X, pady=4)
+        self.export_var = tk.StringVar(value="")
+        ttk.Label(act_frame, textvariable=self.export_var, foreground="#555").pack(anchor=tk.W)
 
         # Recent transactions on right
         ttk.Label(right, text="Recent Transactions", font=("Segoe UI", 12, "bold")).pack(anchor=tk.W)
@@ -130,36 +133,92 @@ class ClientApp(tk.Tk):
         vsb.pack(side=tk.RIGHT, fill=tk.Y)
         self.tv.configure(yscrollcommand=vsb.set)
 
+        self.last_txn_id = None
         self._refresh_account_view()
+        self._poll_job = self.after(POLL_MS, self._poll_account)
+
+    def _fetch_account_changes(self, acc_id, last_id):
+        """Account row plus ledger rows newer than ``last_id`` (the last RECENT_TRANSACTIONS on first load)."""
+        acc = self.db.get_account(acc_id)
+        if last_id is None:
+            return acc, self.db.get_transactions(acc_id=acc_id, limit=RECENT_TRANSACTIONS), True
+        rows = self.db.get_transactions_since(acc_id, last_id, limit=RECENT_TRANSACTIONS)
+        # a full page may have skipped rows between it and last_id, so reload
+        return acc, rows, len(rows) >= RECENT_TRANSACTIONS
 
     def _refresh_account_view(self):
         try:
-            # refresh account info
-            acc = self.db.get_account(self.account[0])
-            if acc:
-                self.account = acc
-                self.balance_var.set(f"${float(self.account[4]):,.2f}")
-
-            # refresh transactions
-            for r in self.tv.get_children():
-                self.tv.delete(r)
-            rows = self.db.get_transactions(acc_id=self.account[0], limit=200)
-            for idx, r in enumerate(rows):
-                # r: (id, account_id, amount, type, note, created_at)
-                amt = f"${float(r[2]):+.2f}"
-                dt = r[5].strftime("%Y-%m-%d %H:%M:%S") if hasattr(r[5], "strftime") else str(r[5])
-                self.tv.insert("", tk.END, values=(r[0], amt, r[3], r[4] or "", dt))
+            self._apply_account_changes(self._fetch_account_changes(self.account[0], self.last_txn_id))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh: {e}")
 
+    def _apply_account_changes(self, changes):
+        acc, rows, full = changes
+        if self.account is None or (acc and acc[0] != self.account[0]):
+            return  # logged out (or into another account) while the read ran
+        if acc:
+            self.account = acc
+            self.balance_var.set(f"${float(self.account[4]):,.2f}")
+        if full:
+            self.tv.delete(*self.tv.get_children())
+        self._show_transactions(rows)
+        if rows:
+            self.last_txn_id = max(self.last_txn_id or 0, max(r[0] for r in rows))
+        elif full:
+            self.last_txn_id = 0
+
+    def _show_transactions(self, rows):
+        """Insert ledger rows the list does not show yet, keeping it newest first."""
+        children = self.tv.get_children()
+        for r in sorted((r for r in rows if r), key=lambda r: r[0]):
+            # r: (id, account_id, amount, type, note, created_at)
+            if self.tv.exists(str(r[0])):
+                continue
+            # new rows normally land on top; a late row from elsewhere goes below newer ones
+            pos = 0
+            while pos < len(children) and int(children[pos]) > r[0]:
+                pos += 1
+            amt = f"${float(r[2]):+.2f}"
+            dt = r[5].strftime("%Y-%m-%d %H:%M:%S") if hasattr(r[5], "strftime") else str(r[5])
+            self.tv.insert("", pos, iid=str(r[0]), values=(r[0], amt, r[3], r[4] or "", dt))
+            children = self.tv.get_children()
+        if len(children) > RECENT_TRANSACTIONS:
+            self.tv.delete(*children[RECENT_TRANSACTIONS:])
+
+    def _apply_receipt(self, balance, row):
+        """Show the result of a write made here without re-reading the account."""
+        self._writes += 1
+        self.balance_var.set(f"${float(balance):,.2f}")
+        self.account = self.account[:4] + (balance,) + self.account[5:]
+        if row:
+            self._show_transactions([row])
+
+    def _poll_account(self):
+        self._poll_job = self.after(POLL_MS, self._poll_account)
+        if self.account is not None and not self.executor.pending("poll"):
+            self.executor.submit("poll", self._fetch_account_changes, self.account[0], self.last_txn_id,
+                                 on_done=lambda changes, writes=self._writes: self._apply_poll(changes, writes))
+
+    def _apply_poll(self, changes, writes):
+        # read before a local write landed: its balance is older than the one shown
+        if writes == self._writes:
+            self._apply_account_changes(changes)
+
+    def _stop_polling(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.executor.cancel("poll")
+
     def _deposit_dialog(self):
         amt = simpledialog.askfloat("Deposit", "Enter amount to deposit:", minvalue=0.01, parent=self)
         if amt is None:
             return
         try:
-            new_bal = self.db.change_balance(self.account[0], float(amt), trans_type="deposit", note="Customer deposit")
+            new_bal, row = self.db.change_balance(self.account[0], float(amt), trans_type="deposit",
+                                                  note="Customer deposit", receipt=True)
+            self._apply_receipt(new_bal, row)
             messagebox.showinfo("Success", f"Deposited ${amt:.2f}\nNew balance: ${new_bal:.2f}")
-            self._refresh_account_view()
         except Exception as e:
             messagebox.showerror("Error", f"Deposit failed: {e}")
 
@@ -168,9 +227,10 @@ class ClientApp(tk.Tk):
         if amt is None:
             return
         try:
-            new_bal = self.db.change_balance(self.account[0], -float(amt), trans_type="withdraw", note="Customer withdrawal")
+            new_bal, row = self.db.change_balance(self.account[0], -float(amt), trans_type="withdraw",
+                                                  note="Customer withdrawal", receipt=True)
+            self._apply_receipt(new_bal, row)
             messagebox.showinfo("Success", f"Withdrew ${amt:.2f}\nNew balance: ${new_bal:.2f}")
-            self._refresh_account_view()
         except Exception as e:
             messagebox.showerror("Error", f"Withdrawal failed: {e}")
 
@@ -202,10 +262,11 @@ class ClientApp(tk.Tk):
                 amt = float(amt_ent.get().strip())
                 if amt <= 0:
                     raise ValueError("Amount must be positive")
-                self.db.transfer_funds(self.account[0], to_id, amt, note_ent.get().strip() or None)
+                new_bal, _, row, _ = self.db.transfer_funds(self.account[0], to_id, amt,
+                                                            note_ent.get().strip() or None, receipt=True)
+                self._apply_receipt(new_bal, row)
                 messagebox.showinfo("Success", f"Transferred ${amt:.2f} to account {to_id}")
                 dlg.destroy()
-                self._refresh_account_view()
             except ValueError as ve:
                 messagebox.showerror("Invalid input", str(ve), parent=dlg)
             except Exception as e:
@@ -257,20 +318,31 @@ class ClientApp(tk.Tk):
         fn = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")], initialfile=f"transactions_acc{self.account[0]}_{datetime.now().strftime('%Y%m%d')}.csv")
         if not fn:
             return
-        try:
-            self.db.export_transactions_csv(fn, acc_id=self.account[0])
-            messagebox.showinfo("Exported", f"Transactions exported to {fn}")
-        except Exception as e:
+
+        def progress(rows):
+            self.executor.post(self.export_var.set, f"Exporting... {rows:,} rows")
+
+        def done(rows):
+            self.export_var.set("")
+            messagebox.showinfo("Exported", f"{rows:,} transactions exported to {fn}")
+
+        def failed(e):
+            self.export_var.set("")
             messagebox.showerror("Error", f"Export failed: {e}")
 
+        self.export_var.set("Exporting...")
+        self.executor.submit("export", self.db.export_transactions_csv, fn, acc_id=self.account[0],
+                             progress=progress, on_done=done, on_error=failed)
+
     def _logout(self):
+        self._stop_polling()
         self.account = None
         self._build_login_ui()
 
 
 if __name__ == "__main__":
     try:
-        db = BankDB()
+        db = BankDB(pool_size=max(DB_POOL_SIZE, PORTAL_WORKERS + 1))
     except Exception as e:
         root = tk.Tk()
         root.withdraw()
@@ -0,0 +1,492 @@
+"""Versioned schema migrations for the bank database.
+
+Each entry in MIGRATIONS upgrades the schema by one version, with the DDL
+for every backend dialect ("mysql", "sqlite"). A step is either a SQL
+string or a callable ``step(conn, cur)`` for work that has to look at the
+database first. Applied versions are recorded in ``schema_migrations``, so
+``migrate()`` is safe to run on every start-up.
+
+``check_query_plans()`` EXPLAINs the queries BankDB runs on hot paths and
+reports any that fall back to a full table scan:
+
+    python migrations.py [--sqlite PATH] [--check]
+"""
+import logging
+import sys
+from datetime import datetime
+
+
+def _add_index(table, name, columns, kind="INDEX"):
+    """MySQL has no CREATE INDEX IF NOT EXISTS; skip indexes that are already there."""
+    def step(conn, cur):
+        cur.execute("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA=DATABASE() "
+                    "AND TABLE_NAME=%s AND INDEX_NAME=%s LIMIT 1", (table, name))
+        if cur.fetchone():
+            return
+        try:
+            cur.execute(f"ALTER TABLE {table} ADD {kind} {name} ({columns})")
+            logging.info(f"Created index {name} on {table}")
+        except Exception as e:
+            if kind != "FULLTEXT INDEX":
+                raise
+            # name search falls back to LIKE on ix_accounts_name
+            logging.warning(f"Could not create full-text index {name}: {e}")
+    return step
+
+
+def _sqlite_account_columns(conn, cur):
+    # columns older bank.db files may lack; ADD COLUMN cannot carry UNIQUE
+    cur.execute("PRAGMA table_info(accounts)")
+    have = {r[1] for r in cur.fetchall()}
+    for col, decl in (("emirates_id", "TEXT"),
+                      ("account_type", "TEXT NOT NULL DEFAULT 'Savings'"),
+                      ("status", "TEXT NOT NULL DEFAULT 'Active'"),
+                      ("created_at", "TIMESTAMP"),
+                      ("last_transaction_date", "TIMESTAMP")):
+        if col not in have:
+            cur.execute(f"ALTER TABLE accounts ADD COLUMN {col} {decl}")
+
+
+def _sqlite_fts(conn, cur):
+    # FTS5 index over account names, kept in sync with accounts by triggers
+    try:
+        cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS accounts_fts USING fts5("
+                    "name, content='accounts', content_rowid='id', prefix='2 3')")
+    except Exception as e:
+        # SQLite built without FTS5: name search falls back to ix_accounts_name
+        logging.warning(f"Full-text search unavailable on SQLite: {e}")
+        return
+    cur.execute("INSERT INTO accounts_fts(accounts_fts) VALUES ('rebuild')")
+    for ddl in (
+        """CREATE TRIGGER IF NOT EXISTS accounts_fts_ai AFTER INSERT ON accounts BEGIN
+            INSERT INTO accounts_fts(rowid, name) VALUES (new.id, new.name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS accounts_fts_ad AFTER DELETE ON accounts BEGIN
+            INSERT INTO accounts_fts(accounts_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS accounts_fts_au AFTER UPDATE OF name ON accounts BEGIN
+            INSERT INTO accounts_fts(accounts_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO accounts_fts(rowid, name) VALUES (new.id, new.name);
+        END""",
+    ):
+        cur.execute(ddl)
+
+
+def _sqlite_slot_daily_flows(conn, cur):
+    # SQLite cannot change a primary key in place; rebuild the table with slot in it
+    cur.execute("""CREATE TABLE daily_flows_slotted (
+                day TEXT NOT NULL,
+                account_type TEXT NOT NULL,
+                slot INTEGER NOT NULL DEFAULT 0,
+                deposits REAL NOT NULL DEFAULT 0,
+                withdrawals REAL NOT NULL DEFAULT 0,
+                transfers_in REAL NOT NULL DEFAULT 0,
+                transfers_out REAL NOT NULL DEFAULT 0,
+                loan_disbursements REAL NOT NULL DEFAULT 0,
+                debt_payments REAL NOT NULL DEFAULT 0,
+                transactions INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, account_type, slot)
+            )""")
+    cols = ("day, account_type, deposits, withdrawals, transfers_in, transfers_out, "
+            "loan_disbursements, debt_payments, transactions")
+    cur.execute(f"INSERT INTO daily_flows_slotted ({cols}) SELECT {cols} FROM daily_flows")
+    cur.execute("DROP TABLE daily_flows")
+    cur.execute("ALTER TABLE daily_flows_slotted RENAME TO daily_flows")
+
+
+# (table, index name, columns) for the filters and sort orders BankDB uses;
+# keyset pages order by (created_at, id), so id is the last key column
+QUERY_INDEXES = (
+    ("accounts", "ix_accounts_created", "created_at, id"),
+    ("accounts", "ix_accounts_status", "status, created_at, id"),
+    ("accounts", "ix_accounts_type", "account_type, created_at, id"),
+    ("accounts", "ix_accounts_balance", "balance"),
+    ("transactions", "ix_transactions_account_created", "account_id, created_at, id"),
+    ("transactions", "ix_transactions_created", "created_at, id"),
+    ("loans", "ix_loans_status_created", "status, created_at, id"),
+    ("loans", "ix_loans_account_created", "account_id, created_at, id"),
+    ("loans", "ix_loans_created", "created_at, id"),
+    ("debts", "ix_debts_account_status", "account_id, status, created_at, id"),
+    ("debts", "ix_debts_status_created", "status, created_at, id"),
+    ("debts", "ix_debts_created", "created_at, id"),
+)
+
+
+MIGRATIONS = [
+    (1, "base tables", {
+        "mysql": [
+            """CREATE TABLE IF NOT EXISTS accounts (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                account_number VARCHAR(20) NOT NULL UNIQUE,
+                emirates_id VARCHAR(18) UNIQUE,
+                balance DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+                phone VARCHAR(20),
+                email VARCHAR(100),
+                account_type VARCHAR(20) NOT NULL DEFAULT 'Savings',
+                status VARCHAR(10) NOT NULL DEFAULT 'Active',
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_transaction_date DATETIME NULL
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS transactions (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                account_id INT NOT NULL,
+                amount DECIMAL(15,2) NOT NULL,
+                type VARCHAR(32) NOT NULL,
+                note VARCHAR(255),
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS loans (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                account_id INT NOT NULL,
+                amount DECIMAL(15,2) NOT NULL,
+                term_months INT NOT NULL,
+                rate DECIMAL(6,3) NOT NULL,
+                status VARCHAR(16) NOT NULL DEFAULT 'Pending',
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME NULL
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS debts (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                account_id INT NOT NULL,
+                amount DECIMAL(15,2) NOT NULL,
+                description VARCHAR(255),
+                status VARCHAR(16) NOT NULL DEFAULT 'Open',
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB""",
+        ],
+        "sqlite": [
+            """CREATE TABLE IF NOT EXISTS accounts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                account_number TEXT NOT NULL UNIQUE,
+                emirates_id TEXT UNIQUE,
+                balance REAL NOT NULL DEFAULT 0.0,
+                phone TEXT,
+                email TEXT,
+                account_type TEXT NOT NULL DEFAULT 'Savings',
+                status TEXT NOT NULL DEFAULT 'Active',
+                created_at TIMESTAMP DEFAULT (datetime('now','localtime')),
+                last_transaction_date TIMESTAMP
+            )""",
+            """CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                type TEXT NOT NULL,
+                note TEXT,
+                created_at TIMESTAMP DEFAULT (datetime('now','localtime'))
+            )""",
+            """CREATE TABLE IF NOT EXISTS loans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                term_months INTEGER NOT NULL,
+                rate REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'Pending',
+                created_at TIMESTAMP DEFAULT (datetime('now','localtime')),
+                updated_at TIMESTAMP
+            )""",
+            """CREATE TABLE IF NOT EXISTS debts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                description TEXT,
+                status TEXT NOT NULL DEFAULT 'Open',
+                created_at TIMESTAMP DEFAULT (datetime('now','localtime'))
+            )""",
+            _sqlite_account_columns,
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_accounts_emirates_id ON accounts(emirates_id)",
+        ],
+    }),
+    (2, "summary and sequence tables", {
+        "mysql": [
+            """CREATE TABLE IF NOT EXISTS bank_summary (
+                account_type VARCHAR(32) NOT NULL,
+                status VARCHAR(16) NOT NULL,
+                slot TINYINT UNSIGNED NOT NULL,
+                accounts BIGINT NOT NULL DEFAULT 0,
+                balance DECIMAL(20,2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (account_type, status, slot)
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS account_openings (
+                day DATE NOT NULL PRIMARY KEY,
+                accounts BIGINT NOT NULL DEFAULT 0
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS sequences (
+                name VARCHAR(64) NOT NULL PRIMARY KEY,
+                next_value BIGINT NOT NULL
+            ) ENGINE=InnoDB""",
+        ],
+        "sqlite": [
+            """CREATE TABLE IF NOT EXISTS bank_summary (
+                account_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                accounts INTEGER NOT NULL DEFAULT 0,
+                balance REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (account_type, status, slot)
+            )""",
+            """CREATE TABLE IF NOT EXISTS account_openings (
+                day TEXT NOT NULL PRIMARY KEY,
+                accounts INTEGER NOT NULL DEFAULT 0
+            )""",
+            """CREATE TABLE IF NOT EXISTS sequences (
+                name TEXT NOT NULL PRIMARY KEY,
+                next_value INTEGER NOT NULL
+            )""",
+        ],
+    }),
+    (3, "account name search indexes", {
+        "mysql": [
+            _add_index("accounts", "ix_accounts_name", "name"),
+            _add_index("accounts", "ft_accounts_name", "name", kind="FULLTEXT INDEX"),
+        ],
+        "sqlite": [
+            "CREATE INDEX IF NOT EXISTS ix_accounts_name ON accounts(name)",
+            _sqlite_fts,
+        ],
+    }),
+    (4, "indexes for account, ledger, loan and debt queries", {
+        "mysql": [_add_index(t, name, cols) for t, name, cols in QUERY_INDEXES],
+        "sqlite": [f"CREATE INDEX IF NOT EXISTS {name} ON {t}({cols})" for t, name, cols in QUERY_INDEXES],
+    }),
+    (5, "transaction archive table", {
+        "mysql": [
+            """CREATE TABLE IF NOT EXISTS transactions_archive (
+                id BIGINT NOT NULL PRIMARY KEY,
+                account_id INT NOT NULL,
+                amount DECIMAL(15,2) NOT NULL,
+                type VARCHAR(32) NOT NULL,
+                note VARCHAR(255),
+                created_at DATETIME,
+                KEY ix_transactions_archive_account_created (account_id, created_at, id),
+                KEY ix_transactions_archive_created (created_at, id)
+            ) ENGINE=InnoDB ROW_FORMAT=COMPRESSED""",
+        ],
+        "sqlite": [
+            """CREATE TABLE IF NOT EXISTS transactions_archive (
+                id INTEGER PRIMARY KEY,
+                account_id INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                type TEXT NOT NULL,
+                note TEXT,
+                created_at TIMESTAMP
+            )""",
+            "CREATE INDEX IF NOT EXISTS ix_transactions_archive_account_created "
+            "ON transactions_archive(account_id, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_transactions_archive_created ON transactions_archive(created_at, id)",
+        ],
+    }),
+    (6, "daily cash-flow rollups", {
+        "mysql": [
+            """CREATE TABLE IF NOT EXISTS daily_flows (
+                day DATE NOT NULL,
+                account_type VARCHAR(32) NOT NULL,
+                deposits DECIMAL(20,2) NOT NULL DEFAULT 0,
+                withdrawals DECIMAL(20,2) NOT NULL DEFAULT 0,
+                transfers_in DECIMAL(20,2) NOT NULL DEFAULT 0,
+                transfers_out DECIMAL(20,2) NOT NULL DEFAULT 0,
+                loan_disbursements DECIMAL(20,2) NOT NULL DEFAULT 0,
+                debt_payments DECIMAL(20,2) NOT NULL DEFAULT 0,
+                transactions BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, account_type)
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS rollup_state (
+                name VARCHAR(64) NOT NULL PRIMARY KEY,
+                position BIGINT NOT NULL DEFAULT 0,
+                upto BIGINT NOT NULL DEFAULT 0
+            ) ENGINE=InnoDB""",
+        ],
+        "sqlite": [
+            """CREATE TABLE IF NOT EXISTS daily_flows (
+                day TEXT NOT NULL,
+                account_type TEXT NOT NULL,
+                deposits REAL NOT NULL DEFAULT 0,
+                withdrawals REAL NOT NULL DEFAULT 0,
+                transfers_in REAL NOT NULL DEFAULT 0,
+                transfers_out REAL NOT NULL DEFAULT 0,
+                loan_disbursements REAL NOT NULL DEFAULT 0,
+                debt_payments REAL NOT NULL DEFAULT 0,
+                transactions INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, account_type)
+            )""",
+            """CREATE TABLE IF NOT EXISTS rollup_state (
+                name TEXT NOT NULL PRIMARY KEY,
+                position INTEGER NOT NULL DEFAULT 0,
+                upto INTEGER NOT NULL DEFAULT 0
+            )""",
+        ],
+    }),
+    (7, "ledger high-water-mark index", {
+        "mysql": [_add_index("transactions", "ix_transactions_account_id", "account_id, id")],
+        "sqlite": ["CREATE INDEX IF NOT EXISTS ix_transactions_account_id ON transactions(account_id, id)"],
+    }),
+    (8, "daily_flows rows per slot, like bank_summary", {
+        "mysql": [
+            "ALTER TABLE daily_flows ADD COLUMN slot SMALLINT NOT NULL DEFAULT 0 AFTER account_type, "
+            "DROP PRIMARY KEY, ADD PRIMARY KEY (day, account_type, slot)",
+        ],
+        "sqlite": [_sqlite_slot_daily_flows],
+    }),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version INT NOT NULL PRIMARY KEY, description VARCHAR(200), applied_at VARCHAR(32))")
+        cur.execute("SELECT MAX(version) FROM schema_migrations")
+        row = cur.fetchone()
+        conn.commit()
+        return int(row[0] or 0)
+    finally:
+        cur.close()
+
+
+def migrate(conn, dialect, target=None):
+    """Apply every migration newer than the database's version; returns the versions applied."""
+    target = LATEST_VERSION if target is None else target
+    version = current_version(conn)
+    applied = []
+    for number, description, steps in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        cur = conn.cursor()
+        try:
+            for step in steps[dialect]:
+                if callable(step):
+                    step(conn, cur)
+                else:
+                    cur.execute(step)
+            cur.execute("INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s,%s,%s)",
+                        (number, description, datetime.now().isoformat(timespec="seconds")))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logging.exception(f"Schema migration {number} ({description}) failed")
+            raise
+        finally:
+            cur.close()
+        logging.info(f"Applied schema migration {number}: {description}")
+        applied.append(number)
+    return applied
+
+
+# Queries BankDB runs on hot paths, with representative parameters. Keep in
+# step with get_accounts / _keyset_page / _keyset_seek / _search_condition / get_loans ...
+# Names in ORDERED_WALKS may walk an index in ORDER BY order, since LIMIT
+# stops them early; everything else has to seek.
+HOT_QUERIES = (
+    ("accounts newest first",
+     "SELECT id FROM accounts ORDER BY created_at DESC, id DESC LIMIT 100", ()),
+    ("accounts by status",
+     "SELECT id FROM accounts WHERE status=%s ORDER BY created_at DESC, id DESC LIMIT 100", ("Active",)),
+    ("accounts by type",
+     "SELECT id FROM accounts WHERE account_type=%s ORDER BY created_at DESC, id DESC LIMIT 100", ("Savings",)),
+    ("accounts keyset page",
+     "SELECT id FROM accounts WHERE created_at <= %s AND (created_at < %s OR id < %s) "
+     "ORDER BY created_at DESC, id DESC LIMIT 100", ("2030-01-01", "2030-01-01", 1)),
+    ("accounts oldest first",
+     "SELECT id FROM accounts ORDER BY created_at ASC, id ASC LIMIT 100", ()),
+    ("accounts keyset seek back",
+     "SELECT id FROM accounts WHERE created_at >= %s AND (created_at > %s OR id > %s) "
+     "ORDER BY created_at ASC, id ASC LIMIT 100", ("2000-01-01", "2000-01-01", 1)),
+    ("account login by number",
+     "SELECT id FROM accounts WHERE account_number=%s AND emirates_id=%s", ("AC00000001", "784-1990-1234567-1")),
+    ("account by number prefix",
+     "SELECT id FROM accounts WHERE account_number >= %s AND account_number < %s", ("AC0001", "AC0002")),
+    ("account by Emirates ID prefix",
+     "SELECT id FROM accounts WHERE emirates_id >= %s AND emirates_id < %s", ("784-1990", "784-1991")),
+    ("accounts by balance range",
+     "SELECT id FROM accounts WHERE balance >= %s AND balance <= %s", (1000000, 2000000)),
+    ("transactions of an account",
+     "SELECT id FROM transactions WHERE account_id=%s ORDER BY created_at DESC, id DESC LIMIT 200", (1,)),
+    ("new transactions of an account",
+     "SELECT id FROM transactions WHERE account_id=%s AND id > %s ORDER BY id DESC LIMIT 200", (1, 0)),
+    ("archived transactions of an account",
+     "SELECT id FROM transactions_archive WHERE account_id=%s ORDER BY created_at DESC, id DESC LIMIT 200", (1,)),
+    ("daily cash flow for a date range",
+     "SELECT day, SUM(deposits) FROM daily_flows WHERE day >= %s GROUP BY day", ("2024-01-01",)),
+    ("transactions keyset page",
+     "SELECT id FROM transactions WHERE created_at <= %s AND (created_at < %s OR id < %s) "
+     "ORDER BY created_at DESC, id DESC LIMIT 100", ("2030-01-01", "2030-01-01", 1)),
+    ("transactions in a date range",
+     "SELECT id FROM transactions WHERE created_at >= %s AND created_at <= %s "
+     "ORDER BY created_at DESC, id DESC LIMIT 200", ("2030-01-01", "2030-02-01")),
+    ("loans by status",
+     "SELECT id FROM loans WHERE status=%s ORDER BY created_at DESC, id DESC LIMIT 100", ("Pending",)),
+    ("loans of an account",
+     "SELECT id FROM loans WHERE account_id=%s ORDER BY created_at DESC LIMIT 100", (1,)),
+    ("debts of an account by status",
+     "SELECT id FROM debts WHERE account_id=%s AND status=%s ORDER BY created_at DESC LIMIT 100", (1, "Open")),
+    ("debts by status",
+     "SELECT id FROM debts WHERE status=%s ORDER BY created_at DESC, id DESC LIMIT 100", ("Open",)),
+)
+
+ORDERED_WALKS = {"accounts newest first", "accounts oldest first"}
+
+# MySQL picks a table scan over an index on tiny tables; only flag scans
+# the optimizer expects to touch at least this many rows
+EXPLAIN_MIN_ROWS = 1000
+
+
+def check_query_plans(conn, dialect):
+    """EXPLAIN each HOT_QUERIES entry; returns ``[(name, plan detail)]`` for full scans.
+
+    A full scan is a table scan, or a scan of a whole index for a query
+    that should be able to seek (not in ORDERED_WALKS).
+    """
+    problems = []
+    cur = conn.cursor()
+    try:
+        for name, sql, params in HOT_QUERIES:
+            if dialect == "sqlite":
+                cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+                for row in cur.fetchall():
+                    detail = row[-1]
+                    if detail.startswith("SCAN ") and ("INDEX" not in detail or name not in ORDERED_WALKS):
+                        problems.append((name, detail))
+            else:
+                cur.execute("EXPLAIN " + sql, params)
+                cols = [d[0] for d in cur.description]
+                for row in cur.fetchall():
+                    plan = dict(zip(cols, row))
+                    scan = plan.get("type") == "ALL" or (plan.get("type") == "index" and name not in ORDERED_WALKS)
+                    if scan and int(plan.get("rows") or 0) >= EXPLAIN_MIN_ROWS:
+                        problems.append((name, f"{plan.get('type')} scan of {plan.get('table')} "
+                                               f"(~{plan.get('rows')} rows, key {plan.get('key')})"))
+    finally:
+        cur.close()
+    return problems
+
+
+def main(argv=None):
+    import bankcore
+
+    argv = sys.argv[1:] if argv is None else argv
+    if "--sqlite" in argv:
+        backend = bankcore.create_backend("sqlite", path=argv[argv.index("--sqlite") + 1])
+    else:
+        backend = bankcore.create_backend(bankcore.DB_BACKEND)
+    conn = backend.connect()
+    try:
+        applied = migrate(conn, backend.name)
+        print(f"Schema at version {current_version(conn)}"
+              + (f" (applied {', '.join(map(str, applied))})" if applied else ""))
+        if "--check" in argv:
+            problems = check_query_plans(conn, backend.name)
+            for name, detail in problems:
+                print(f"FULL SCAN  {name}: {detail}")
+            print(f"{len(HOT_QUERIES) - len({p[0] for p in problems})}/{len(HOT_QUERIES)} hot queries use an index")
+            return 1 if problems else 0
+        return 0
+    finally:
+        backend.close(conn)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Cold-start benchmark for the two entry points.
+
+Each run imports an entry point in a fresh interpreter, the way a user
+starting the app does, and records the wall time plus which heavy
+libraries got loaded. Usage:
+
+    python startup_bench.py [--runs N] [--json] [--max-seconds S]
+
+With --max-seconds the exit status is 1 when an entry point's median is
+slower, so the number can be tracked from a scheduled job.
+"""
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = ("clientside", "bankmanagementsystem")
+HEAVY_MODULES = ("matplotlib", "numpy", "requests")
+
+_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+print(json.dumps({{"import_seconds": time.perf_counter() - t,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs=5):
+    """Median process and import time of ``import module`` over ``runs`` cold starts."""
+    wall, imports, heavy = [], [], set()
+    for _ in range(runs):
+        t = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                             capture_output=True, text=True, check=True)
+        wall.append(time.perf_counter() - t)
+        probe = json.loads(out.stdout.strip().splitlines()[-1])
+        imports.append(probe["import_seconds"])
+        heavy.update(probe["heavy"])
+    return {"entry_point": module, "runs": runs,
+            "process_seconds": round(statistics.median(wall), 4),
+            "import_seconds": round(statistics.median(imports), 4),
+            "heavy_modules_loaded": sorted(heavy)}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    runs = int(argv[argv.index("--runs") + 1]) if "--runs" in argv else 5
+    limit = float(argv[argv.index("--max-seconds") + 1]) if "--max-seconds" in argv else None
+    results = [measure(m, runs) for m in ENTRY_POINTS]
+    if "--json" in argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print(f"{r['entry_point']:<22} process {r['process_seconds'] * 1000:7.1f} ms   "
+                  f"import {r['import_seconds'] * 1000:7.1f} ms   "
+                  f"heavy: {', '.join(r['heavy_modules_loaded']) or 'none'}")
+    if limit is not None and any(r["process_seconds"] > limit for r in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())